@@ -21,11 +21,14 @@ To use the CURRENT app, run:
 """
 
 import sys
+import subprocess
 import threading
 import time
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from typing import List, Dict, NamedTuple, Optional
 import asyncio
+import atexit
+import concurrent.futures
 from pathlib import Path
 
 # Add src to path for ollama_client import
@@ -39,7 +42,35 @@ except ImportError:
     OllamaMessage = None
     ResponseError = None
 
-from PySide6.QtCore import Qt, QTimer, QObject, Signal, Slot
+try:
+    import requests
+except ImportError:
+    requests = None
+
+# AnythingLLM health probes use one pooled httpx.AsyncClient on the window's
+# background loop (candidates probed concurrently). Without httpx, fall back to
+# a shared keep-alive requests.Session probed sequentially.
+try:
+    import httpx
+except ImportError:
+    httpx = None
+_ANYLLM_HTTP = None
+if httpx is None and requests is not None:
+    from requests.adapters import HTTPAdapter
+    _ANYLLM_HTTP = requests.Session()
+    _ANYLLM_HTTP.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+    _ANYLLM_HTTP.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+    atexit.register(_ANYLLM_HTTP.close)
+
+# Prefer orjson for decoding Ollama/AnythingLLM payloads; stdlib json otherwise
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    import json
+    _loads = json.loads
+
+from PySide6.QtCore import Qt, QTimer, QObject, QEvent, Signal, Slot, QMetaObject, Q_ARG
 from PySide6.QtGui import QKeySequence, QShortcut, QIcon, QPixmap
 from PySide6.QtWidgets import (
     QApplication,
@@ -68,6 +99,24 @@ from PySide6.QtWidgets import (
 )
 
 
+# Hidden-console spawn settings, computed once instead of per subprocess call
+_IS_WIN = sys.platform.startswith("win")
+if _IS_WIN:
+    _STARTUPINFO = subprocess.STARTUPINFO()
+    _STARTUPINFO.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+    _STARTUPINFO.wShowWindow = 0
+    # Prefer Python's constants when available, fallback to literals
+    _CREATIONFLAGS_HIDDEN = getattr(subprocess, "CREATE_NO_WINDOW", 0x08000000)
+    # Combine no-window with detached process for GUI apps / servers
+    _CREATIONFLAGS_DETACHED = _CREATIONFLAGS_HIDDEN | getattr(subprocess, "DETACHED_PROCESS", 0x00000008)
+else:
+    _STARTUPINFO = None
+    _CREATIONFLAGS_HIDDEN = 0
+    _CREATIONFLAGS_DETACHED = 0
+_win_spawn_kwargs = {"startupinfo": _STARTUPINFO, "creationflags": _CREATIONFLAGS_HIDDEN}
+_win_spawn_kwargs_detached = {"startupinfo": _STARTUPINFO, "creationflags": _CREATIONFLAGS_DETACHED}
+
+
 # Message dataclass now imported from ollama_client
 # OllamaClient class replaced with AsyncOllamaClient import
 # Legacy sync wrapper for backward compatibility
@@ -123,6 +172,16 @@ class Message:
     content: str
 
 
+class HealthState(NamedTuple):
+    """Snapshot of one LLM health poll, applied to every mirror at once."""
+    status: str
+    color: str
+    detail: str
+    version: str
+    local_ready: Optional[bool]  # None when no local GGUF model is selected
+    local_detail: str
+
+
 class LlamaCppClient:
     """Simple wrapper around llama-cpp-python to load a GGUF model and provide a
     chat() method similar to OllamaClient.
@@ -292,16 +351,49 @@ class AuraNexusWindow(QMainWindow):
         self.setMinimumSize(900, 600)
 
         self.ollama = OllamaClient()
+        # Shared keep-alive session for Ollama/AnythingLLM HTTP calls
+        self._http = requests.Session() if requests else None
+        self._ollama_tags_cache: Optional[tuple] = None
         try:
             self.tts = TTS()
         except Exception:
             self.tts = DummyTTS()
         self._invoker = Invoker(self)
+        # Bounded pool for short background jobs (probes, checks, pulls)
+        self._pool = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="aura-worker")
+        # Dedicated single worker for LLM health polls (at most one in flight)
+        self._health_exec = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-health")
+        self._health_inflight: Optional[concurrent.futures.Future] = None
+        # Persistent asyncio loop for async HTTP probes
+        self._bg_loop = asyncio.new_event_loop()
+        threading.Thread(target=self._bg_loop.run_forever, name="aura-asyncio", daemon=True).start()
+        self._anyllm_async = None
+        # Probe URLs known to reject HEAD (405) are probed with GET instead
+        self._anyllm_head_ok: dict[str, bool] = {}
+        # One Ollama client (and connection pool) for the window's lifetime,
+        # entered on the background loop it is bound to; exited in closeEvent
+        self._ollama_client = None
+        if AsyncOllamaClient is not None:
+            try:
+                client = AsyncOllamaClient()
+                asyncio.run_coroutine_threadsafe(client.__aenter__(), self._bg_loop).result(timeout=2)
+                self._ollama_client = client
+            except Exception:
+                self._ollama_client = None
+        # (timestamp, value) TTL cache for Ollama metadata; only touched on _bg_loop
+        self._ollama_cache = {"ver": (0.0, ""), "models": (0.0, [])}
+        # (raw model list, base-name set, formatted "a, b, c") from the last health poll
+        self._models_fmt: tuple = ((), frozenset(), "")
         self.local_llm_client = None
         self.local_model_enabled = False
         self.local_n_ctx = 2048
         self.local_n_threads = None
         self.local_num_predict = 512
+        # GPU presence does not change during a session; see _detect_nvidia
+        self._gpu_cached: Optional[bool] = None
+        # Last avatar settings read from / written to profile.json
+        self._profile_cache: Optional[Dict] = None
+        self._profile_lock = threading.Lock()
 
         self.system_prompt = "You are Aura, a friendly, helpful AI assistant. Keep answers concise."
         self.messages: List[Message] = []
@@ -326,6 +418,8 @@ class AuraNexusWindow(QMainWindow):
         h1.addWidget(QLabel("Model"))
         self.model_combo = QComboBox()
         self.model_combo.addItem("llama3")
+        # Mirror of the combo's item texts for O(1) membership checks
+        self._model_combo_set: set[str] = {"llama3"}
         h1.addWidget(self.model_combo)
         try:
             self.model_combo.currentIndexChanged.connect(lambda _: QTimer.singleShot(0, self._on_model_combo_changed))
@@ -335,7 +429,7 @@ class AuraNexusWindow(QMainWindow):
         self.model_refresh_btn.clicked.connect(self._refresh_models_dropdown_async)
         h1.addWidget(self.model_refresh_btn)
         self.model_health_btn = QPushButton("Health")
-        self.model_health_btn.clicked.connect(self._update_llm_health_async)
+        self.model_health_btn.clicked.connect(self._wake_llm_health)
         h1.addWidget(self.model_health_btn)
         self.model_test_btn = QPushButton("Test Chat")
         self.model_test_btn.clicked.connect(self.on_test_chat)
@@ -407,6 +501,11 @@ class AuraNexusWindow(QMainWindow):
         self.user_name_edit = QLineEdit("You")
         self.user_name_edit.setFixedWidth(90)
         h2.addWidget(self.user_name_edit)
+        # AnythingLLM identity prefix, rebuilt only when a name changes so the
+        # message prefix stays byte-identical across turns
+        self._anyllm_prefix: Optional[str] = None
+        self.assistant_name_edit.textChanged.connect(self._invalidate_anyllm_prefix)
+        self.user_name_edit.textChanged.connect(self._invalidate_anyllm_prefix)
         h2.addWidget(QLabel("Target Length"))
         self.response_target_spin = QSpinBox()
         self.response_target_spin.setRange(1, 20)
@@ -441,6 +540,8 @@ class AuraNexusWindow(QMainWindow):
         self.anyllm_base = QLineEdit("http://localhost:3001")
         self.anyllm_base.setFixedWidth(140)
         h3.addWidget(self.anyllm_base)
+        self._rebuild_anyllm_urls(self.anyllm_base.text())
+        self.anyllm_base.textChanged.connect(self._rebuild_anyllm_urls)
         self.anyllm_key = QLineEdit()
         self.anyllm_key.setEchoMode(QLineEdit.Password)
         self.anyllm_key.setPlaceholderText("API Key")
@@ -571,7 +672,7 @@ class AuraNexusWindow(QMainWindow):
         self.ollama_status.setStyleSheet("color: #666; font-weight: bold")
         oll_row.addWidget(self.ollama_status)
         btn_check_oll = QPushButton("Check")
-        btn_check_oll.clicked.connect(self._update_llm_health_async)
+        btn_check_oll.clicked.connect(self._wake_llm_health)
         oll_row.addWidget(btn_check_oll)
         btn_start_oll = QPushButton("Start")
         btn_start_oll.clicked.connect(self._start_ollama_async)
@@ -589,10 +690,10 @@ class AuraNexusWindow(QMainWindow):
         self.docker_status.setStyleSheet("color: #666; font-weight: bold")
         dock_row.addWidget(self.docker_status)
         btn_check_dock = QPushButton("Check")
-        btn_check_dock.clicked.connect(self.on_check_dependencies)
+        btn_check_dock.clicked.connect(lambda: self.on_check_dependencies(force=True))
         dock_row.addWidget(btn_check_dock)
         btn_start_dock = QPushButton("Start")
-        btn_start_dock.clicked.connect(lambda: threading.Thread(target=self._force_connect_work, daemon=True).start())
+        btn_start_dock.clicked.connect(lambda: self._pool.submit(self._force_connect_work))
         dock_row.addWidget(btn_start_dock)
         dock_row.addStretch(1)
         svc_l.addLayout(dock_row)
@@ -619,7 +720,7 @@ class AuraNexusWindow(QMainWindow):
         self.gpu_status.setStyleSheet("color: #666; font-weight: bold")
         gpu_row.addWidget(self.gpu_status)
         btn_check_gpu = QPushButton("Check")
-        btn_check_gpu.clicked.connect(lambda: self._update_gpu_status())
+        btn_check_gpu.clicked.connect(lambda: self._update_gpu_status(force=True))
         gpu_row.addWidget(btn_check_gpu)
         gpu_row.addStretch(1)
         svc_l.addLayout(gpu_row)
@@ -672,7 +773,7 @@ class AuraNexusWindow(QMainWindow):
         self.status_left = QLabel("Ready")
         status.addWidget(self.status_left)
         dep_btn = QPushButton("Check Dependencies")
-        dep_btn.clicked.connect(self.on_check_dependencies)
+        dep_btn.clicked.connect(lambda: self.on_check_dependencies(force=True))
         status.addPermanentWidget(dep_btn)
         force_btn = QPushButton("Connect Services")
         force_btn.clicked.connect(self.on_force_connect)
@@ -701,9 +802,18 @@ class AuraNexusWindow(QMainWindow):
         QTimer.singleShot(0, self._load_profile)
         QTimer.singleShot(0, self._load_avatar_profile)
         QTimer.singleShot(250, self._update_llm_health_async)
-        self._last_llm_health_ts = 0.0
         self._last_llm_health_status = None
         self._last_llm_health_detail = None
+        self._llm_health_pending = False
+        # Recurring health poll owned by the window; its interval backs off while
+        # the status is stable and it is paused while the window is minimized
+        self._health_interval = 1.0
+        self._health_stable_count = 0
+        self._health_timer = QTimer(self)
+        self._health_timer.timeout.connect(self._update_llm_health_async)
+        self._health_timer.start(1000)
+        # Last value written per health widget property, so steady polls skip Qt calls
+        self._applied: Dict[str, str] = {}
         self._auto_intro_done = False
         QTimer.singleShot(800, self._auto_intro_if_needed)
         self._vts = None
@@ -857,6 +967,8 @@ class AuraNexusWindow(QMainWindow):
             "local_n_threads": self.local_n_threads,
             "local_num_predict": self.local_num_predict,
         }
+        if self._profile_cache is not None:
+            data["avatar"] = self._profile_cache
         try:
             with open(self._profile_path(), "w", encoding="utf-8") as f:
                 json.dump(data, f, indent=2)
@@ -868,6 +980,22 @@ class AuraNexusWindow(QMainWindow):
             self._save_profile()
         except Exception:
             pass
+        try:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._health_timer.stop()
+            self._health_exec.shutdown(wait=False, cancel_futures=True)
+        except Exception:
+            pass
+        try:
+            if self._anyllm_async is not None:
+                asyncio.run_coroutine_threadsafe(self._anyllm_async.aclose(), self._bg_loop).result(timeout=2)
+            if self._ollama_client is not None:
+                asyncio.run_coroutine_threadsafe(
+                    self._ollama_client.__aexit__(None, None, None), self._bg_loop
+                ).result(timeout=2)
+            self._bg_loop.call_soon_threadsafe(self._bg_loop.stop)
+        except Exception:
+            pass
         return super().closeEvent(event)
 
     def resizeEvent(self, event):  # type: ignore[override]
@@ -1176,6 +1304,7 @@ class AuraNexusWindow(QMainWindow):
                         try:
                             QMessageBox.information(self, "Import complete", out)
                             # Refresh list
+                            self._ollama_tags_cache = None
                             QTimer.singleShot(0, self._refresh_models_dropdown_async)
                         except Exception:
                             pass
@@ -1284,7 +1413,8 @@ class AuraNexusWindow(QMainWindow):
             ws = self.anyllm_workspace.text().strip() or "general"
             if not base or not key or not ws:
                 return
-            import requests, time as _t
+            if requests is None:
+                return
             headers = {"Authorization": f"Bearer {key}", "Content-Type": "application/json"}
             target = self.anyllm_log_target.currentText() if hasattr(self, 'anyllm_log_target') else 'Documents'
             if target == 'Chat History':
@@ -1305,7 +1435,7 @@ class AuraNexusWindow(QMainWindow):
                 except Exception:
                     # Fallback to documents
                     payload = {
-                        "title": f"Aura Nexus Chat {_t.strftime('%Y-%m-%d %H:%M:%S')}",
+                        "title": f"Aura Nexus Chat {time.strftime('%Y-%m-%d %H:%M:%S')}",
                         "content": f"User:\n{user_text}\n\nAssistant:\n{assistant_text}",
                         "source": "AuraNexus",
                         "tags": ["chat", "aura"],
@@ -1317,7 +1447,7 @@ class AuraNexusWindow(QMainWindow):
                         pass
             else:
                 payload = {
-                    "title": f"Aura Nexus Chat {_t.strftime('%Y-%m-%d %H:%M:%S')}",
+                    "title": f"Aura Nexus Chat {time.strftime('%Y-%m-%d %H:%M:%S')}",
                     "content": f"User:\n{user_text}\n\nAssistant:\n{assistant_text}",
                     "source": "AuraNexus",
                     "tags": ["chat", "aura"],
@@ -1415,19 +1545,29 @@ class AuraNexusWindow(QMainWindow):
                 self.messages.append(Message("assistant", reply))
                 self._auto_intro_done = True
             self._ui_call(ui)
-        threading.Thread(target=work, daemon=True).start()
+        self._pool.submit(work)
+
+    def _invalidate_anyllm_prefix(self, _text: str = "") -> None:
+        self._anyllm_prefix = None
+
+    def _anyllm_context_prefix(self) -> str:
+        prefix = self._anyllm_prefix
+        if prefix is None:
+            a, u = self._names_tuple()
+            prefix = f"Assistant name: {a}. User name: {u}. Refer to yourself as {a} and address the user as {u}. "
+            self._anyllm_prefix = prefix
+        return prefix
 
     def _anyllm_ask(self, message: str):
-        import requests, json
+        import json
+        if requests is None:
+            raise RuntimeError("AnythingLLM requires the 'requests' package")
         base = self.anyllm_base.text().strip().rstrip("/")
         key = self.anyllm_key.text().strip()
         workspace = self.anyllm_workspace.text().strip()
         if not key:
             raise ValueError("Missing AnythingLLM API key")
-        a, u = self._names_tuple()
-        context_prefix = (
-            f"Assistant name: {a}. User name: {u}. Refer to yourself as {a} and address the user as {u}. "
-        )
+        context_prefix = self._anyllm_context_prefix()
         header_variants = [
             {"Authorization": f"Bearer {key}", "Content-Type": "application/json", "Accept": "application/json"},
             {"X-API-KEY": key, "Content-Type": "application/json", "Accept": "application/json"},
@@ -1449,7 +1589,7 @@ class AuraNexusWindow(QMainWindow):
                     if r.status_code == 404:
                         raise RuntimeError("not found")
                     r.raise_for_status()
-                    data = r.json()
+                    data = _loads(r.content)
                     break
                 except Exception as e:
                     last_error = e
@@ -1467,7 +1607,7 @@ class AuraNexusWindow(QMainWindow):
                             ws_payload["threadId"] = self.anyllm_thread_id
                         r = requests.post(url, headers=headers, json=ws_payload, timeout=30)
                         r.raise_for_status()
-                        data = r.json()
+                        data = _loads(r.content)
                         break
                     except Exception as e:
                         last_error = e
@@ -1482,9 +1622,9 @@ class AuraNexusWindow(QMainWindow):
 
     def _set_model_combo_value(self, value: str) -> None:
         try:
-            items = [self.model_combo.itemText(i) for i in range(self.model_combo.count())]
-            if value and value not in items:
+            if value and value not in self._model_combo_set:
                 self.model_combo.addItem(value)
+                self._model_combo_set.add(value)
             if value:
                 self.model_combo.setCurrentText(value)
         except Exception:
@@ -1493,13 +1633,12 @@ class AuraNexusWindow(QMainWindow):
     def _apply_model_selection(self, sel: str) -> None:
         try:
             # ensure sel is in the model list before applying
-            items = [self.model_combo.itemText(i) for i in range(self.model_combo.count())]
-            if sel and sel not in items:
+            if sel and sel not in self._model_combo_set:
                 # warn the user and do not set the model
                 self.status_left.setText(f"Model not available: {sel}")
                 try:
-                    self.llm_health.setText('Model Not Available')
-                    self.llm_health.setStyleSheet("color: #d88; font-weight: bold")
+                    self._set_if_changed("llm_health.text", self.llm_health.setText, 'Model Not Available')
+                    self._set_if_changed("llm_health.style", self.llm_health.setStyleSheet, "color: #d88; font-weight: bold")
                 except Exception:
                     pass
                 self._append_models_log(f"Attempted to select model not in Ollama: {sel}")
@@ -1517,6 +1656,7 @@ class AuraNexusWindow(QMainWindow):
             # Defer actual model application to allow the model list to refresh
             sel = self.model_combo.currentText().strip() or "llama3"
             self.status_left.setText(f"Model selection changed: {sel}")
+            self._reset_health_backoff()
             QTimer.singleShot(400, lambda: self._apply_model_selection(sel))
         except Exception:
             pass
@@ -1525,26 +1665,7 @@ class AuraNexusWindow(QMainWindow):
         def work():
             names: list[str] = []
             try:
-                r = requests.get("http://localhost:11434/api/tags", timeout=2)
-                if r.status_code < 400:
-                    data = r.json()
-                    raw = data.get("models") or data.get("tags") or []
-                    tmp: list[str] = []
-                    for m in raw:
-                        name = (
-                            (m.get("model") if isinstance(m, dict) else None)
-                            or (m.get("name") if isinstance(m, dict) else None)
-                            or (str(m) if not isinstance(m, dict) else None)
-                        )
-                        if not name:
-                            continue
-                        base = str(name).split(":")[0]
-                        tmp.append(base)
-                    seen = set()
-                    for n in tmp:
-                        if n not in seen:
-                            seen.add(n)
-                            names.append(n)
+                names = self._parse_ollama_tags(self._fetch_ollama_tags())
             except Exception:
                 try:
                     self._append_models_log("Failed to fetch models from Ollama (refresh)")
@@ -1554,18 +1675,28 @@ class AuraNexusWindow(QMainWindow):
                 names = ["llama3"]
             current = self.model_combo.currentText() if self.model_combo.count() else "llama3"
             def update():
-                self.model_combo.clear()
-                for n in names:
-                    self.model_combo.addItem(n)
-                if current in names:
-                    self.model_combo.setCurrentText(current)
-                else:
-                    self.model_combo.setCurrentIndex(0)
+                # Rebuild the list and restore the selection without emitting
+                # currentIndexChanged: a programmatic refresh must not trigger
+                # _on_model_combo_changed (and its delayed apply + health probe)
+                self.model_combo.blockSignals(True)
+                self.model_combo.view().setUpdatesEnabled(False)
+                try:
+                    self.model_combo.clear()
+                    for n in names:
+                        self.model_combo.addItem(n)
+                    self._model_combo_set = set(names)
+                    if current in names:
+                        self.model_combo.setCurrentText(current)
+                    else:
+                        self.model_combo.setCurrentIndex(0)
+                finally:
+                    self.model_combo.view().setUpdatesEnabled(True)
+                    self.model_combo.blockSignals(False)
                 self.ollama.model = self.model_combo.currentText()
                 self.status_left.setText(f"Models refreshed ({len(names)} found)")
                 QTimer.singleShot(0, self._update_llm_health_async)
             self._ui_call(update)
-        threading.Thread(target=work, daemon=True).start()
+        self._pool.submit(work)
 
     def _ui_call(self, fn):
         try:
@@ -1601,27 +1732,16 @@ class AuraNexusWindow(QMainWindow):
                 self.latency_label.setText(f"Latency: {elapsed:0.0f} ms")
                 self._update_llm_health_async()
             self._ui_call(ui)
-        threading.Thread(target=work, daemon=True).start()
+        self._pool.submit(work)
 
     def on_run_diagnostics(self) -> None:
         def work():
-            import requests
             summary = []
             ollama_ok = False
             models = []
             try:
-                r = requests.get("http://localhost:11434/api/tags", timeout=3)
-                if r.status_code < 400:
-                    ollama_ok = True
-                    raw = r.json().get("models") or r.json().get("tags") or []
-                    for m in raw:
-                        name = (
-                            (m.get("model") if isinstance(m, dict) else None)
-                            or (m.get("name") if isinstance(m, dict) else None)
-                            or (str(m) if not isinstance(m, dict) else None)
-                        )
-                        if name:
-                            models.append(str(name).split(":")[0])
+                models = self._parse_ollama_tags(self._fetch_ollama_tags())
+                ollama_ok = True
             except Exception:
                 pass
             summary.append(f"Ollama: {'OK' if ollama_ok else 'DOWN'}")
@@ -1645,20 +1765,11 @@ class AuraNexusWindow(QMainWindow):
             def ui():
                 self.chat_view.append(f"<i>Diagnostics:</i> {text}")
             self._ui_call(ui)
-        threading.Thread(target=work, daemon=True).start()
+        self._pool.submit(work)
 
     def _check_cmd(self, args: list[str]) -> bool:
-        import subprocess, platform
-        try:
-            si = None
-            creationflags = 0
-            if platform.system() == "Windows":
-                si = subprocess.STARTUPINFO()
-                si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                si.wShowWindow = 0
-                # Prefer Python's constant when available, fallback to literal
-                creationflags = getattr(subprocess, "CREATE_NO_WINDOW", 0x08000000)
-            subprocess.run(args, capture_output=True, text=True, check=False, startupinfo=si, creationflags=creationflags)
+        try:
+            subprocess.run(args, capture_output=True, text=True, check=False, **_win_spawn_kwargs)
             return True
         except Exception:
             return False
@@ -1666,55 +1777,59 @@ class AuraNexusWindow(QMainWindow):
     def _check_docker(self) -> bool:
         if self._check_cmd(["docker", "version"]):
             return True
-        import os, subprocess, platform
+        import os
         candidate = os.path.join(os.environ.get("ProgramFiles", "C:\\Program Files"), "Docker", "Docker", "resources", "bin", "docker.exe")
         try:
-            si = None
-            creationflags = 0
-            if platform.system() == "Windows":
-                si = subprocess.STARTUPINFO()
-                si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                si.wShowWindow = 0
-                creationflags = getattr(subprocess, "CREATE_NO_WINDOW", 0x08000000)
-            subprocess.run([candidate, "version"], capture_output=True, text=True, check=False, startupinfo=si, creationflags=creationflags)
+            subprocess.run([candidate, "version"], capture_output=True, text=True, check=False, **_win_spawn_kwargs)
             return True
         except Exception:
             return False
 
-    def _check_ollama(self) -> bool:
-        if self._check_cmd(["ollama", "--version"]):
-            return True
-        import requests
+    def _ollama_alive(self) -> bool:
+        """Cheap liveness check: HEAD on Ollama's root, headers only."""
         try:
-            r = requests.get("http://localhost:11434/api/tags", timeout=2)
+            r = self._http.head("http://localhost:11434/", timeout=1)
             return r.status_code < 400
         except Exception:
             return False
 
-    def on_check_dependencies(self):
+    def _check_ollama(self) -> bool:
+        if self._check_cmd(["ollama", "--version"]):
+            return True
+        return self._ollama_alive()
+
+    def on_check_dependencies(self, force: bool = False):
         docker_ok = self._check_docker()
         ollama_ok = self._check_ollama()
-        gpu = self._detect_nvidia()
+        gpu = self._detect_nvidia(force=force)
         msg = []
         msg.append(f"Docker: {'OK' if docker_ok else 'Missing'}")
         msg.append(f"Ollama: {'OK' if ollama_ok else 'Missing'}")
         msg.append(f"GPU (NVIDIA): {'Detected' if gpu else 'Not detected'}")
-        self.status_left.setText(" | ".join(msg))
-        try:
-            if hasattr(self, 'docker_status'):
-                self.docker_status.setText('Online' if docker_ok else 'Offline')
-                self.docker_status.setStyleSheet(f"color: {'#0a0' if docker_ok else '#a00'}; font-weight: bold")
-            if hasattr(self, 'gpu_status'):
-                self.gpu_status.setText('Detected' if gpu else 'Not detected')
-                self.gpu_status.setStyleSheet(f"color: {'#0a0' if gpu else '#a00'}; font-weight: bold")
-        except Exception:
-            pass
-        try:
-            self.llm_health.setToolTip("GPU: " + ("Detected" if gpu else "Not detected"))
-        except Exception:
-            pass
+        self._apply_dependency_status(" | ".join(msg), docker_ok, gpu)
         QTimer.singleShot(0, self._update_llm_health_async)
 
+    def _apply_dependency_status(self, summary: str, docker_ok: bool, gpu: bool) -> None:
+        """Update all dependency labels with a single repaint."""
+        self.setUpdatesEnabled(False)
+        try:
+            self.status_left.setText(summary)
+            try:
+                self._set_if_changed("llm_health.tip", self.llm_health.setToolTip, "GPU: " + ("Detected" if gpu else "Not detected"))
+            except Exception:
+                pass
+            try:
+                if hasattr(self, 'docker_status'):
+                    self.docker_status.setText('Online' if docker_ok else 'Offline')
+                    self.docker_status.setStyleSheet(f"color: {'#0a0' if docker_ok else '#a00'}; font-weight: bold")
+                if hasattr(self, 'gpu_status'):
+                    self.gpu_status.setText('Detected' if gpu else 'Not detected')
+                    self.gpu_status.setStyleSheet(f"color: {'#0a0' if gpu else '#a00'}; font-weight: bold")
+            except Exception:
+                pass
+        finally:
+            self.setUpdatesEnabled(True)
+
     def on_check_dependencies_async(self):
         def work():
             docker_ok = self._check_docker()
@@ -1725,26 +1840,13 @@ class AuraNexusWindow(QMainWindow):
             msg.append(f"Ollama: {'OK' if ollama_ok else 'Missing'}")
             msg.append(f"GPU (NVIDIA): {'Detected' if gpu else 'Not detected'}")
             def update():
-                self.status_left.setText(" | ".join(msg))
-                try:
-                    self.llm_health.setToolTip("GPU: " + ("Detected" if gpu else "Not detected"))
-                except Exception:
-                    pass
-                try:
-                    if hasattr(self, 'docker_status'):
-                        self.docker_status.setText('Online' if docker_ok else 'Offline')
-                        self.docker_status.setStyleSheet(f"color: {'#0a0' if docker_ok else '#a00'}; font-weight: bold")
-                    if hasattr(self, 'gpu_status'):
-                        self.gpu_status.setText('Detected' if gpu else 'Not detected')
-                        self.gpu_status.setStyleSheet(f"color: {'#0a0' if gpu else '#a00'}; font-weight: bold")
-                except Exception:
-                    pass
+                self._apply_dependency_status(" | ".join(msg), docker_ok, gpu)
                 QTimer.singleShot(0, self._update_llm_health_async)
             self._ui_call(update)
-        threading.Thread(target=work, daemon=True).start()
+        self._pool.submit(work)
 
-    def _update_gpu_status(self) -> None:
-        gpu = self._detect_nvidia()
+    def _update_gpu_status(self, force: bool = False) -> None:
+        gpu = self._detect_nvidia(force=force)
         try:
             if hasattr(self, 'gpu_status'):
                 self.gpu_status.setText('Detected' if gpu else 'Not detected')
@@ -1763,71 +1865,45 @@ class AuraNexusWindow(QMainWindow):
         )
         if ans != QMessageBox.Yes:
             return
-        threading.Thread(target=self._force_connect_work, daemon=True).start()
+        self._pool.submit(self._force_connect_work)
 
     def _force_connect_work(self) -> None:
         if not self._check_docker():
             try:
-                import os, subprocess, platform
+                import os
                 exe = os.path.join(os.environ.get("ProgramFiles", "C:\\Program Files"), "Docker", "Docker", "Docker Desktop.exe")
-                si = None
-                creationflags = 0
-                if platform.system() == "Windows":
-                    si = subprocess.STARTUPINFO()
-                    si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                    si.wShowWindow = 0
-                    # Combine no-window with detached process for GUI apps
-                    no_window = getattr(subprocess, "CREATE_NO_WINDOW", 0x08000000)
-                    detached = getattr(subprocess, "DETACHED_PROCESS", 0x00000008)
-                    creationflags = no_window | detached
-                subprocess.Popen([exe], close_fds=True, startupinfo=si, creationflags=creationflags)
+                subprocess.Popen([exe], close_fds=True, **_win_spawn_kwargs_detached)
                 time.sleep(8)
             except Exception:
                 pass
         if not self._check_ollama():
             try:
-                import os, subprocess, platform
+                import os
                 ollama_exe = os.path.join(os.environ.get("LOCALAPPDATA", ""), "Programs", "Ollama", "ollama.exe")
-                si = None
-                creationflags = 0
-                if platform.system() == "Windows":
-                    si = subprocess.STARTUPINFO()
-                    si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                    si.wShowWindow = 0
-                    no_window = getattr(subprocess, "CREATE_NO_WINDOW", 0x08000000)
-                    detached = getattr(subprocess, "DETACHED_PROCESS", 0x00000008)
-                    creationflags = no_window | detached
-                subprocess.Popen([ollama_exe, "serve"], close_fds=True, startupinfo=si, creationflags=creationflags)
+                subprocess.Popen([ollama_exe, "serve"], close_fds=True, **_win_spawn_kwargs_detached)
                 time.sleep(3)
             except Exception:
                 pass
         self._ui_call(self.on_check_dependencies)
         self._ui_call(self._refresh_models_dropdown_async)
 
-    def _detect_nvidia(self) -> bool:
-        import subprocess, platform
-        try:
-            si = None
-            creationflags = 0
-            if platform.system() == "Windows":
-                si = subprocess.STARTUPINFO()
-                si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                si.wShowWindow = 0
-                creationflags = getattr(subprocess, "CREATE_NO_WINDOW", 0x08000000)
-            r = subprocess.run(["nvidia-smi"], capture_output=True, text=True, startupinfo=si, creationflags=creationflags)
+    def _detect_nvidia(self, force: bool = False) -> bool:
+        """Return True if nvidia-smi runs; memoized unless force is set."""
+        if not force and self._gpu_cached is not None:
+            return self._gpu_cached
+        self._gpu_cached = self._run_nvidia_smi()
+        return self._gpu_cached
+
+    def _run_nvidia_smi(self) -> bool:
+        try:
+            r = subprocess.run(["nvidia-smi"], capture_output=True, text=True, **_win_spawn_kwargs)
             return r.returncode == 0
         except Exception:
             return False
 
     def _detect_providers_async(self) -> None:
         def work():
-            import requests
-            oll = False
-            try:
-                r = requests.get("http://localhost:11434/api/tags", timeout=2)
-                oll = r.status_code < 400
-            except Exception:
-                oll = False
+            oll = self._ollama_alive()
             def update():
                 parts = []
                 parts.append(f"Ollama: {'Detected' if oll else 'Not found'}")
@@ -1837,84 +1913,146 @@ class AuraNexusWindow(QMainWindow):
                     self._refresh_models_dropdown_async()
                 self._update_llm_health_async()
             self._ui_call(update)
-        threading.Thread(target=work, daemon=True).start()
+        self._pool.submit(work)
 
     def _append_models_log(self, text: str) -> None:
         self.models_console.append(text)
 
     def _start_ollama_async(self) -> None:
         def work():
-            import os, subprocess, platform, time as _t
+            import os, time as _t
             try:
-                si = None
-                creationflags = 0
-                if platform.system() == "Windows":
-                    si = subprocess.STARTUPINFO()
-                    si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                    si.wShowWindow = 0
-                    no_window = getattr(subprocess, "CREATE_NO_WINDOW", 0x08000000)
-                    detached = getattr(subprocess, "DETACHED_PROCESS", 0x00000008)
-                    creationflags = no_window | detached
                 exe = os.path.join(os.environ.get("LOCALAPPDATA", ""), "Programs", "Ollama", "ollama.exe")
-                subprocess.Popen([exe, "serve"], close_fds=True, startupinfo=si, creationflags=creationflags)
+                subprocess.Popen([exe, "serve"], close_fds=True, **_win_spawn_kwargs_detached)
                 _t.sleep(2)
             except Exception:
                 pass
             self._ui_call(self._update_llm_health_async)
-        threading.Thread(target=work, daemon=True).start()
+        self._pool.submit(work)
 
     def on_ollama_pull(self) -> None:
+        model = self.oll_model_input.text().strip() or "llama3"  # Read on the GUI thread
+
         def work():
-            import subprocess, os, platform
-            model = self.oll_model_input.text().strip() or "llama3"
             try:
-                si = None
-                creationflags = 0
-                if platform.system() == "Windows":
-                    si = subprocess.STARTUPINFO()
-                    si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                    si.wShowWindow = 0
-                    creationflags = getattr(subprocess, "CREATE_NO_WINDOW", 0x08000000)
-                subprocess.run(["ollama", "pull", model], check=False, timeout=600, startupinfo=si, creationflags=creationflags)
-            except Exception:
-                pass
-            try:
-                exe = os.path.join(os.environ.get("LOCALAPPDATA", ""), "Programs", "Ollama", "ollama.exe")
-                si = None
-                creationflags = 0
-                if platform.system() == "Windows":
-                    si = subprocess.STARTUPINFO()
-                    si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                    si.wShowWindow = 0
-                    creationflags = getattr(subprocess, "CREATE_NO_WINDOW", 0x08000000)
-                subprocess.run([exe, "pull", model], check=False, timeout=600, startupinfo=si, creationflags=creationflags)
-            except Exception:
-                pass
+                self._pull_via_http(model)
+            except Exception as e:
+                if requests is not None and self._http is not None and not isinstance(e, requests.ConnectionError):
+                    self._ui_call(lambda err=e: self._append_models_log(f"Pull failed: {err}"))
+                    return
+                # Ollama HTTP API unreachable; fall back to the CLI
+                if not self._pull_via_cli(model):
+                    self._ui_call(lambda: self._append_models_log(f"Pull failed: {model}"))
+                    return
+            self._ollama_tags_cache = None
             self._ui_call(lambda: self._append_models_log(f"Pulled model: {model}"))
             self._ui_call(self._refresh_models_dropdown_async)
             self._ui_call(self._update_llm_health_async)
-        threading.Thread(target=work, daemon=True).start()
+        self._pool.submit(work)
+
+    def _pull_via_http(self, model: str) -> None:
+        """Stream /api/pull and log each status change to the Models console."""
+        payload = {"name": model, "stream": True}
+        # Connect timeout, then at most 10 min between streamed chunks (like the CLI path)
+        with self._http.post("http://localhost:11434/api/pull", json=payload, stream=True, timeout=(5, 600)) as r:
+            r.raise_for_status()
+            last = None
+            for line in r.iter_lines():
+                if not line:
+                    continue
+                try:
+                    evt = _loads(line)
+                except Exception:
+                    continue
+                if evt.get("error"):
+                    raise RuntimeError(evt["error"])
+                msg = evt.get("status") or ""
+                total = evt.get("total")
+                completed = evt.get("completed")
+                if total and completed is not None:
+                    msg = f"{msg} {int(completed) * 100 // int(total)}% ({completed}/{total} bytes)"
+                if msg and msg != last:
+                    last = msg
+                    self._ui_call(lambda s=msg: self._append_models_log(s))
+
+    def _pull_via_cli(self, model: str) -> bool:
+        """Run `ollama pull`; True if it exited successfully."""
+        import os, shutil
+        exe = shutil.which("ollama") or os.path.join(os.environ.get("LOCALAPPDATA", ""), "Programs", "Ollama", "ollama.exe")
+        try:
+            res = subprocess.run([exe, "pull", model], check=False, timeout=600, **_win_spawn_kwargs)
+            return res.returncode == 0
+        except Exception:
+            return False
 
     def on_ollama_list(self) -> None:
         def work():
-            import subprocess
             out = ""
             try:
-                si = None
-                creationflags = 0
-                if sys.platform.startswith("win"):
-                    si = subprocess.STARTUPINFO()
-                    si.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                    si.wShowWindow = 0
-                    creationflags = getattr(subprocess, "CREATE_NO_WINDOW", 0x08000000)
-                p = subprocess.run(["ollama", "list"], check=False, capture_output=True, text=True, timeout=15, startupinfo=si, creationflags=creationflags)
-                out = (p.stdout or p.stderr or "").strip()
-            except Exception:
-                pass
+                lines = []
+                for m in self._fetch_ollama_tags():
+                    if not isinstance(m, dict):
+                        lines.append(str(m))
+                        continue
+                    name = m.get("name") or m.get("model") or "?"
+                    extra = []
+                    size = m.get("size")
+                    if size:
+                        extra.append(f"{size / (1024 ** 3):.1f} GB")
+                    param_size = (m.get("details") or {}).get("parameter_size")
+                    if param_size:
+                        extra.append(str(param_size))
+                    lines.append(f"{name} ({', '.join(extra)})" if extra else name)
+                out = "\n".join(lines)
+            except Exception as e:
+                if requests is None or isinstance(e, requests.ConnectionError):
+                    # Ollama HTTP API unreachable; fall back to the CLI
+                    try:
+                        p = subprocess.run(["ollama", "list"], check=False, capture_output=True, text=True, timeout=15, **_win_spawn_kwargs)
+                        out = (p.stdout or p.stderr or "").strip()
+                    except Exception:
+                        pass
             if not out:
                 out = "(no output)"
             self._ui_call(lambda: self._append_models_log(out))
-        threading.Thread(target=work, daemon=True).start()
+        self._pool.submit(work)
+
+    def _fetch_ollama_tags(self) -> list:
+        """Return the raw /api/tags model entries, cached for a few seconds.
+
+        Raises on connection or HTTP errors so callers can tell "down" from
+        "no models".
+        """
+        now = time.monotonic()
+        cached = self._ollama_tags_cache
+        if cached is not None and (now - cached[0]) < 5.0:
+            return cached[1]
+        r = self._http.get("http://localhost:11434/api/tags", timeout=2)
+        r.raise_for_status()
+        data = _loads(r.content)
+        raw = data.get("models") or data.get("tags") or []
+        self._ollama_tags_cache = (now, raw)
+        return raw
+
+    @staticmethod
+    def _parse_ollama_tags(raw: list) -> list[str]:
+        """Base model names (tag suffix stripped), de-duplicated in order."""
+        names: list[str] = []
+        seen = set()
+        for m in raw:
+            name = (
+                (m.get("model") if isinstance(m, dict) else None)
+                or (m.get("name") if isinstance(m, dict) else None)
+                or (str(m) if not isinstance(m, dict) else None)
+            )
+            if not name:
+                continue
+            base = str(name).split(":")[0]
+            if base not in seen:
+                seen.add(base)
+                names.append(base)
+        return names
+
     def _setup_anyllm_probe(self) -> None:
         enabled = self.anyllm_enable.isChecked()
         if not hasattr(self, "anyllm_probe_timer"):
@@ -1981,117 +2119,222 @@ class AuraNexusWindow(QMainWindow):
         else:
             QMessageBox.information(self, "Avatar", "Connected, but parameter update may not be visible. Check model parameters.")
 
+    def _avatar_profile_path(self) -> str:
+        import os
+        base = os.path.join(os.path.expanduser("~"), "AppData", "Roaming", "AuraNexus")
+        os.makedirs(base, exist_ok=True)
+        return os.path.join(base, "profile.json")
+
     def _load_avatar_profile(self) -> None:
-        try:
-            import os, json
-            base = os.path.join(os.path.expanduser("~"), "AppData", "Roaming", "AuraNexus")
-            os.makedirs(base, exist_ok=True)
-            prof = os.path.join(base, "profile.json")
-            if not os.path.exists(prof):
+        """Read the avatar section on a worker thread and apply it on the UI thread."""
+        def work():
+            try:
+                import os, json
+                prof = self._avatar_profile_path()
+                if not os.path.exists(prof):
+                    return
+                with self._profile_lock:
+                    with open(prof, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                av = data.get("avatar", {})
+                self._profile_cache = dict(av) if av else None
+            except Exception:
                 return
-            with open(prof, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            av = data.get("avatar", {})
-            provider = av.get("provider")
-            atype = av.get("type")
-            abody = av.get("body")
-            host = av.get("host")
-            port = av.get("port")
-            if provider is not None and hasattr(self, 'avatar_provider'):
-                idx = self.avatar_provider.findText(provider)
-                if idx >= 0:
-                    self.avatar_provider.setCurrentIndex(idx)
-            if atype is not None and hasattr(self, 'avatar_type'):
-                idx = self.avatar_type.findText(atype)
-                if idx >= 0:
-                    self.avatar_type.setCurrentIndex(idx)
-            if abody is not None and hasattr(self, 'avatar_body'):
-                idx = self.avatar_body.findText(abody)
-                if idx >= 0:
-                    self.avatar_body.setCurrentIndex(idx)
-            if host and hasattr(self, 'avatar_host'):
-                self.avatar_host.setText(str(host))
-            if port and hasattr(self, 'avatar_port'):
-                self.avatar_port.setText(str(port))
-        except Exception:
-            pass
+            def apply():
+                try:
+                    provider = av.get("provider")
+                    atype = av.get("type")
+                    abody = av.get("body")
+                    host = av.get("host")
+                    port = av.get("port")
+                    if provider is not None and hasattr(self, 'avatar_provider'):
+                        idx = self.avatar_provider.findText(provider)
+                        if idx >= 0:
+                            self.avatar_provider.setCurrentIndex(idx)
+                    if atype is not None and hasattr(self, 'avatar_type'):
+                        idx = self.avatar_type.findText(atype)
+                        if idx >= 0:
+                            self.avatar_type.setCurrentIndex(idx)
+                    if abody is not None and hasattr(self, 'avatar_body'):
+                        idx = self.avatar_body.findText(abody)
+                        if idx >= 0:
+                            self.avatar_body.setCurrentIndex(idx)
+                    if host and hasattr(self, 'avatar_host'):
+                        self.avatar_host.setText(str(host))
+                    if port and hasattr(self, 'avatar_port'):
+                        self.avatar_port.setText(str(port))
+                except Exception:
+                    pass
+            self._ui_call(apply)
+        self._pool.submit(work)
 
     def _save_avatar_profile(self) -> None:
+        """Persist avatar settings off the UI thread, skipping unchanged writes."""
         try:
-            import os, json
-            base = os.path.join(os.path.expanduser("~"), "AppData", "Roaming", "AuraNexus")
-            os.makedirs(base, exist_ok=True)
-            prof = os.path.join(base, "profile.json")
-            data = {}
-            if os.path.exists(prof):
-                try:
-                    with open(prof, "r", encoding="utf-8") as f:
-                        data = json.load(f)
-                except Exception:
-                    data = {}
-            data["avatar"] = {
+            avatar = {
                 "provider": self.avatar_provider.currentText() if hasattr(self, 'avatar_provider') else "None",
                 "type": self.avatar_type.currentText() if hasattr(self, 'avatar_type') else "2D",
                 "body": self.avatar_body.currentText() if hasattr(self, 'avatar_body') else "Head",
                 "host": self.avatar_host.text().strip() if hasattr(self, 'avatar_host') else "localhost",
                 "port": self.avatar_port.text().strip() if hasattr(self, 'avatar_port') else "8001",
             }
-            with open(prof, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
-            self.status_left.setText("Avatar settings saved")
         except Exception:
-            pass
+            return
+        def done():
+            self.status_left.setText("Avatar settings saved")
+        def work():
+            try:
+                import os, json
+                with self._profile_lock:
+                    if self._profile_cache is not None and json.dumps(avatar) == json.dumps(self._profile_cache):
+                        self._ui_call(done)
+                        return
+                    prof = self._avatar_profile_path()
+                    data = {}
+                    if os.path.exists(prof):
+                        try:
+                            with open(prof, "r", encoding="utf-8") as f:
+                                data = json.load(f)
+                        except Exception:
+                            data = {}
+                    data["avatar"] = avatar
+                    with open(prof, "w", encoding="utf-8") as f:
+                        json.dump(data, f, indent=2)
+                    self._profile_cache = avatar
+                self._ui_call(done)
+            except Exception:
+                pass
+        self._pool.submit(work)
 
     def _probe_anyllm(self) -> None:
         """Check AnythingLLM health status."""
         if not self.anyllm_enable.isChecked():
             return
-        base = self.anyllm_base.text().strip().rstrip("/")
-        if not base:
+        url_candidates = self._anyllm_urls
+        if not url_candidates:
             return
-        url_candidates = [f"{base}/api/docs", f"{base}/api/v1/health", f"{base}/api/health"]
-        status = "Offline"
-        color = "#a00"
-        
-        # Use httpx if available (from AsyncOllamaClient dependencies), otherwise fallback
+        if httpx is not None:
+            def done(f):
+                online = not f.cancelled() and f.exception() is None and f.result()
+                self._ui_call(lambda: self._set_anyllm_status(online))
+            fut = asyncio.run_coroutine_threadsafe(self._probe_anyllm_urls(url_candidates), self._bg_loop)
+            fut.add_done_callback(done)
+            return
+
+        def work():
+            online = False
+            if _ANYLLM_HTTP is not None:
+                for u in url_candidates:
+                    try:
+                        if self._anyllm_head_ok.get(u, True):
+                            r = _ANYLLM_HTTP.head(u, timeout=1, allow_redirects=True)
+                            if r.status_code == 405:
+                                self._anyllm_head_ok[u] = False
+                                r = _ANYLLM_HTTP.get(u, timeout=1)
+                        else:
+                            r = _ANYLLM_HTTP.get(u, timeout=1)
+                        if r.status_code < 400:
+                            online = True
+                            break
+                    except Exception:
+                        continue
+            self._ui_call(lambda: self._set_anyllm_status(online))
+        self._pool.submit(work)
+
+    def _rebuild_anyllm_urls(self, text: str) -> None:
+        """Recompute the health-probe candidates whenever the base URL is edited."""
+        base = text.strip().rstrip("/")
+        if base:
+            self._anyllm_urls = (f"{base}/api/docs", f"{base}/api/v1/health", f"{base}/api/health")
+        else:
+            self._anyllm_urls = ()
+
+    async def _anyllm_probe_one(self, url: str):
+        """HEAD the URL, falling back to GET (remembered per URL) on 405."""
+        client = self._anyllm_async
+        if self._anyllm_head_ok.get(url, True):
+            resp = await client.head(url, follow_redirects=True)
+            if resp.status_code != 405:
+                return resp
+            self._anyllm_head_ok[url] = False
+        return await client.get(url)
+
+    async def _probe_anyllm_urls(self, urls: tuple) -> bool:
+        """Probe all candidate URLs concurrently; True on the first success."""
+        if self._anyllm_async is None:
+            self._anyllm_async = httpx.AsyncClient(
+                limits=httpx.Limits(max_keepalive_connections=4, max_connections=8),
+                timeout=httpx.Timeout(1.0),
+            )
+        tasks = [asyncio.ensure_future(self._anyllm_probe_one(u)) for u in urls]
         try:
-            import httpx
-            for u in url_candidates:
+            for next_done in asyncio.as_completed(tasks):
                 try:
-                    resp = httpx.get(u, timeout=2.0)
-                    if resp.status_code < 400:
-                        status = "Online"
-                        color = "#0a0"
-                        break
+                    resp = await next_done
                 except Exception:
                     continue
-        except ImportError:
-            # Fallback to requests
-            import requests
-            for u in url_candidates:
-                try:
-                    r = requests.get(u, timeout=2)
-                    if r.status_code < 400:
-                        status = "Online"
-                        color = "#0a0"
-                        break
-                except Exception:
-                    continue
-        
+                if resp.status_code < 400:
+                    return True
+            return False
+        finally:
+            for t in tasks:
+                t.cancel()
+
+    def _set_anyllm_status(self, online: bool) -> None:
         if hasattr(self, "anyllm_status"):
             try:
-                self.anyllm_status.setText(status)
-                self.anyllm_status.setStyleSheet(f"color: {color}; font-weight: bold")
+                self.anyllm_status.setText("Online" if online else "Offline")
+                self.anyllm_status.setStyleSheet(f"color: {'#0a0' if online else '#a00'}; font-weight: bold")
             except Exception:
                 pass
 
+    def _reset_health_backoff(self) -> None:
+        self._health_stable_count = 0
+        self._set_health_interval(1.0)
+
+    def _set_health_interval(self, seconds: float) -> None:
+        if seconds != self._health_interval:
+            self._health_interval = seconds
+            self._health_timer.setInterval(int(seconds * 1000))
+
+    def changeEvent(self, event):  # type: ignore[override]
+        try:
+            if event.type() == QEvent.WindowStateChange:
+                if self.isMinimized():
+                    self._health_timer.stop()
+                elif not self._health_timer.isActive():
+                    self._health_timer.start()
+                    QTimer.singleShot(0, self._update_llm_health_async)
+        except Exception:
+            pass
+        return super().changeEvent(event)
+
+    def _wake_llm_health(self) -> None:
+        """Explicit user request: drop any backoff and check right away."""
+        self._reset_health_backoff()
+        self._update_llm_health_async()
+
     def _update_llm_health_async(self) -> None:
-        """Check Ollama health using AsyncOllamaClient."""
-        import time as _t
-        now = _t.time()
-        if getattr(self, "_last_llm_health_ts", 0) and (now - self._last_llm_health_ts) < 0.4:
+        """Check Ollama health using AsyncOllamaClient.
+
+        Single-flight: while a probe is running, further calls only mark a
+        pending re-check, which runs once when the current probe finishes.
+        """
+        if self._health_inflight is not None and not self._health_inflight.done():
+            self._llm_health_pending = True
             return
-        self._last_llm_health_ts = now
+        
+        # Qt widgets may only be read on the GUI thread: snapshot what the
+        # worker needs here instead of touching them from the probe
+        cur = self.model_combo.currentText().strip() or "llama3"
+        local_ready: Optional[bool] = None
+        local_detail = ""
+        try:
+            if getattr(self, 'local_model_chk', None) and self.local_model_chk.isChecked():
+                local_ready = bool(getattr(self, 'local_llm_client', None))
+                local_detail = self.local_model_path_edit.text().strip()
+        except Exception:
+            pass
         
         def work():
             status = "Offline"
@@ -2100,96 +2343,122 @@ class AuraNexusWindow(QMainWindow):
             version = ""
             
             # Use upgraded AsyncOllamaClient for health check
-            if AsyncOllamaClient:
+            if self._ollama_client is not None:
                 try:
-                    loop = asyncio.new_event_loop()
-                    asyncio.set_event_loop(loop)
-                    try:
-                        async def check():
-                            async with AsyncOllamaClient() as client:
-                                # Fast health check
-                                healthy = await client.health_check()
-                                if not healthy:
-                                    return "Offline", "#a00", "", ""
-                                
-                                # Get version
-                                ver = await client.get_version()
-                                
-                                # List models
-                                models = await client.list_models()
-                                names = [m.split(':')[0] for m in models]
-                                
-                                cur = self.model_combo.currentText().strip() or "llama3"
-                                if names:
-                                    if cur in names or cur in models:
-                                        return "Ready", "#0a0", f"Ollama {ver} | Current: {cur} | Available: {', '.join(sorted(set(names)))}", ver
-                                    else:
-                                        return "No model", "#d88", f"Ollama {ver} | Current: {cur} (not found) | Available: {', '.join(sorted(set(names)))}", ver
-                                return "No models", "#d88", f"Ollama {ver} | No models installed", ver
+                    async def check():
+                        client = self._ollama_client
+                        # /api/tags answers both "is it up?" and "what is installed?",
+                        # so one round trip replaces the separate health + list calls
+                        now = time.monotonic()
+                        healthy, models = await client.fetch_tags()
+                        if not healthy:
+                            return "Offline", "#a00", "", ""
+                        self._ollama_cache["models"] = (now, models)
                         
-                        status, color, detail, version = loop.run_until_complete(check())
-                    finally:
-                        loop.close()
+                        # Version changes on human timescales; only re-fetch when stale
+                        ver_ts, ver = self._ollama_cache["ver"]
+                        if not ver or now - ver_ts > 10.0:
+                            ver = await client.get_version()
+                            if ver:
+                                self._ollama_cache["ver"] = (now, ver)
+                        
+                        # The installed list rarely changes between polls; reuse the
+                        # name set and formatted string unless it actually did
+                        key = tuple(models)
+                        if key != self._models_fmt[0]:
+                            names_tuple = tuple(sorted({m.split(':', 1)[0] for m in models}))
+                            self._models_fmt = (key, frozenset(names_tuple).union(key), ", ".join(names_tuple))
+                        _, known, available = self._models_fmt
+                        
+                        if key:
+                            if cur in known:
+                                return "Ready", "#0a0", f"Ollama {ver} | Current: {cur} | Available: {available}", ver
+                            else:
+                                return "No model", "#d88", f"Ollama {ver} | Current: {cur} (not found) | Available: {available}", ver
+                        return "No models", "#d88", f"Ollama {ver} | No models installed", ver
+                    
+                    fut = asyncio.run_coroutine_threadsafe(check(), self._bg_loop)
+                    try:
+                        status, color, detail, version = fut.result(timeout=5)
+                    except concurrent.futures.TimeoutError:
+                        fut.cancel()
+                        raise
                 except Exception as e:
                     status = "Offline"
                     color = "#a00"
                     detail = f"Error: {e}"
-                    try:
-                        self.services_console.append(f"Ollama health check failed: {e}")
-                    except Exception:
-                        pass
+                    self._ui_call(lambda err=e: self.services_console.append(f"Ollama health check failed: {err}"))
             else:
                 # Fallback to basic check if imports failed
-                try:
-                    import requests
-                    r = requests.get("http://localhost:11434/api/tags", timeout=2)
-                    if r.status_code < 400:
-                        status = "Ready (legacy)"
-                        color = "#0a0"
-                except Exception:
-                    pass
+                if self._ollama_alive():
+                    status = "Ready (legacy)"
+                    color = "#0a0"
             
-            def ui_update():
-                prior_status = getattr(self, "_last_llm_health_status", None)
-                prior_detail = getattr(self, "_last_llm_health_detail", None)
-                self.llm_health.setText(status)
-                self.llm_health.setStyleSheet(f"color: {color}; font-weight: bold")
-                if detail:
-                    self.llm_health.setToolTip(detail)
-                
-                # If using a local GGUF model, prioritize its health status
-                try:
-                    if getattr(self, 'local_model_chk', None) and self.local_model_chk.isChecked():
-                        if getattr(self, 'local_llm_client', None):
-                            self.llm_health.setText("Local Ready")
-                            self.llm_health.setStyleSheet(f"color: #0a0; font-weight: bold")
-                            self.llm_health.setToolTip(f"Local model: {self.local_model_path_edit.text().strip()}")
-                        else:
-                            self.llm_health.setText("Local Missing")
-                            self.llm_health.setStyleSheet(f"color: #d88; font-weight: bold")
-                except Exception:
-                    pass
-                
-                # Services tab Ollama mirror
-                if hasattr(self, 'ollama_status'):
-                    ollama_txt = f"{status}"
-                    if version:
-                        ollama_txt = f"{status} (v{version})"
-                    self.ollama_status.setText(ollama_txt)
-                    self.ollama_status.setStyleSheet(f"color: {color}; font-weight: bold")
-                
-                if (status != prior_status) or (detail and detail != prior_detail):
-                    if detail:
-                        self.chat_view.append(f"<i>LLM Health:</i> {detail}")
-                        if hasattr(self, 'services_console'):
-                            self.services_console.append(f"LLM: {status} | {detail}")
-                
-                self._last_llm_health_status = status
-                self._last_llm_health_detail = detail
-            
-            self._ui_call(ui_update)
+            # One queued invocation carries the whole snapshot to the UI thread
+            # (a selected local GGUF model takes priority in the header badge)
+            state = HealthState(status, color, detail or "", version or "", local_ready, local_detail)
+            QMetaObject.invokeMethod(self, "_apply_health_state", Qt.QueuedConnection, Q_ARG(object, state))
         
-        threading.Thread(target=work, daemon=True).start()
+        try:
+            self._health_inflight = self._health_exec.submit(work)
+        except RuntimeError:
+            # Executor already shut down (window closing)
+            return
+        # Queued behind the _apply_health_state invocation, so it runs after the result is shown
+        self._health_inflight.add_done_callback(lambda _f: self._ui_call(self._on_health_done))
+
+    def _on_health_done(self) -> None:
+        if self._llm_health_pending:
+            self._llm_health_pending = False
+            QTimer.singleShot(0, self._update_llm_health_async)
+
+    def _set_if_changed(self, key: str, setter, value: str) -> None:
+        """Call a widget setter only when the value differs from the last one applied."""
+        if self._applied.get(key) != value:
+            setter(value)
+            self._applied[key] = value
+
+    @Slot(object)
+    def _apply_health_state(self, state: HealthState) -> None:
+        """Apply a health snapshot to all of its UI mirrors in one pass."""
+        status, color, detail, version = state.status, state.color, state.detail, state.version
+        prior_status = getattr(self, "_last_llm_health_status", None)
+        prior_detail = getattr(self, "_last_llm_health_detail", None)
+        
+        badge_text, badge_color, badge_tip = status, color, detail
+        if state.local_ready is True:
+            badge_text, badge_color, badge_tip = "Local Ready", "#0a0", f"Local model: {state.local_detail}"
+        elif state.local_ready is False:
+            badge_text, badge_color = "Local Missing", "#d88"
+        self._set_if_changed("llm_health.text", self.llm_health.setText, badge_text)
+        self._set_if_changed("llm_health.style", self.llm_health.setStyleSheet, f"color: {badge_color}; font-weight: bold")
+        if badge_tip:
+            self._set_if_changed("llm_health.tip", self.llm_health.setToolTip, badge_tip)
+        
+        # Services tab Ollama mirror
+        if hasattr(self, 'ollama_status'):
+            ollama_txt = f"{status}"
+            if version:
+                ollama_txt = f"{status} (v{version})"
+            self._set_if_changed("ollama_status.text", self.ollama_status.setText, ollama_txt)
+            self._set_if_changed("ollama_status.style", self.ollama_status.setStyleSheet, f"color: {color}; font-weight: bold")
+        
+        if (status != prior_status) or (detail and detail != prior_detail):
+            if detail:
+                self.chat_view.append(f"<i>LLM Health:</i> {detail}")
+                if hasattr(self, 'services_console'):
+                    self.services_console.append(f"LLM: {status} | {detail}")
+        
+        # Back off the poll timer exponentially while nothing changes (capped at 10 s)
+        if status == prior_status and detail == prior_detail:
+            self._health_stable_count += 1
+            self._set_health_interval(min(10.0, 2.0 ** self._health_stable_count))
+        else:
+            self._reset_health_backoff()
+        
+        self._last_llm_health_status = status
+        self._last_llm_health_detail = detail
+
 
 def main() -> int:
     app = QApplication(sys.argv)
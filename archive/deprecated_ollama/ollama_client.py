@@ -9,7 +9,7 @@ import os
 import platform
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import List, Dict, Optional, Iterator, AsyncIterator, Union, Any
+from typing import List, Dict, Optional, Iterator, AsyncIterator, Union, Any, Tuple
 import httpx
 
 
@@ -466,6 +466,21 @@ class OllamaClient(BaseClient):
         except Exception:
             return []
     
+    def fetch_tags(self) -> Tuple[bool, List[str]]:
+        """Probe the server and list models with a single /api/tags request.
+        
+        Returns:
+            (ok, model_names) - ok is False when the server is unreachable
+        """
+        try:
+            resp = self._client.get('/api/tags', timeout=2.0)
+            if resp.status_code != 200:
+                return False, []
+            models = resp.json().get("models", [])
+            return True, [m.get("name", "") for m in models if m.get("name")]
+        except Exception:
+            return False, []
+    
     def create_from_modelfile(self, model_name: str, modelfile_content: str):
         """Create a model from a Modelfile (for importing existing models)."""
         payload = {
@@ -791,6 +806,21 @@ class AsyncOllamaClient(BaseClient):
         except Exception:
             return []
     
+    async def fetch_tags(self) -> Tuple[bool, List[str]]:
+        """Probe the server and list models with a single /api/tags request (async).
+        
+        Returns:
+            (ok, model_names) - ok is False when the server is unreachable
+        """
+        try:
+            resp = await self._client.get('/api/tags', timeout=2.0)
+            if resp.status_code != 200:
+                return False, []
+            models = resp.json().get("models", [])
+            return True, [m.get("name", "") for m in models if m.get("name")]
+        except Exception:
+            return False, []
+    
     async def chat(self, messages: List[Message], system_prompt: Optional[str] = None,
                    options: Optional[Dict] = None, model: Optional[str] = None,
                    format: Optional[Dict] = None, tools: Optional[List[Dict]] = None) -> Dict:
@@ -3,13 +3,32 @@ from __future__ import annotations
 import json
 import threading
 import time
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 try:
     import websocket  # websocket-client
 except Exception:  # pragma: no cover
     websocket = None
 
+# InjectParameterData has a fixed shape; only the request id, parameter name
+# and value vary, so format them into a template instead of json.dumps'ing a dict.
+_VTS_PARAM_TMPL = (
+    '{{"apiName":"VTubestudioPublicAPI","apiVersion":"1.0",'
+    '"requestID":"param-{rid}","messageType":"InjectParameterData",'
+    '"data":{{"param":{{"name":{name},"value":{value},"weight":1.0,"isAdditive":false}},'
+    '"faceFound":true,"mode":"set"}}}}'
+)
+# Batched variant: several parameters in one InjectParameterData frame
+_VTS_BATCH_TMPL = (
+    '{{"apiName":"VTubestudioPublicAPI","apiVersion":"1.0",'
+    '"requestID":"params-{rid}","messageType":"InjectParameterData",'
+    '"data":{{"faceFound":true,"mode":"set","parameterValues":[{values}]}}}}'
+)
+_VTS_VALUE_TMPL = '{{"id":{name},"value":{value},"weight":1.0}}'
+# VTS hands an injected parameter back to face tracking unless it is re-sent
+# at least once per second, so unchanged values are still refreshed this often
+_PARAM_REFRESH_S = 0.5
+
 
 class VTSController:
     """Lean VTube Studio controller stub.
@@ -22,6 +41,9 @@ class VTSController:
         self.url = url
         self.ws: Optional["websocket.WebSocket"] = None
         self._lock = threading.Lock()
+        # (value, monotonic send time) per parameter; identical re-sends are
+        # skipped until the value needs refreshing
+        self._last_params: Dict[str, Tuple[float, float]] = {}
 
     def available(self) -> bool:
         return websocket is not None
@@ -45,6 +67,7 @@ class VTSController:
             except Exception:
                 pass
             self.ws = None
+            self._last_params.clear()
 
     def set_parameter(self, name: str, value: float) -> bool:
         """Set a Live2D parameter value (e.g., MouthOpen, EyeSmile).
@@ -53,25 +76,41 @@ class VTSController:
         """
         if self.ws is None:
             return False
-        payload = {
-            "apiName": "VTubestudioPublicAPI",
-            "apiVersion": "1.0",
-            "requestID": f"param-{int(time.time()*1000)}",
-            "messageType": "InjectParameterData",
-            "data": {
-                "param": {
-                    "name": name,
-                    "value": float(value),
-                    "weight": 1.0,
-                    "isAdditive": False,
-                },
-                "faceFound": True,
-                "mode": "set",
-            },
-        }
+        value = float(value)
+        now = time.monotonic()
+        prev = self._last_params.get(name)
+        if (
+            prev is not None
+            and abs(prev[0] - value) < 1e-4
+            and now - prev[1] < _PARAM_REFRESH_S
+        ):
+            return True
+        msg = _VTS_PARAM_TMPL.format(
+            rid=int(time.time() * 1000), name=json.dumps(name), value=value
+        )
+        try:
+            with self._lock:
+                self.ws.send(msg)
+            self._last_params[name] = (value, now)
+            return True
+        except Exception:
+            return False
+
+    def set_parameters(self, pairs: List[Tuple[str, float]]) -> bool:
+        """Set several Live2D parameters in a single `InjectParameterData` frame."""
+        if self.ws is None or not pairs:
+            return False
+        values = ",".join(
+            _VTS_VALUE_TMPL.format(name=json.dumps(name), value=float(value))
+            for name, value in pairs
+        )
+        msg = _VTS_BATCH_TMPL.format(rid=int(time.time() * 1000), values=values)
         try:
             with self._lock:
-                self.ws.send(json.dumps(payload))
+                self.ws.send(msg)
+            now = time.monotonic()
+            for name, value in pairs:
+                self._last_params[name] = (float(value), now)
             return True
         except Exception:
             return False
@@ -79,11 +118,15 @@ class VTSController:
     def test_emote(self) -> bool:
         """Trigger a simple visual change for validation.
 
-        Attempts to set `MouthOpen` and `EyeSmile` briefly.
+        Attempts to set `MouthOpen` and `EyeSmile` briefly. Returns right
+        after the "on" frame; the reset is sent from a timer 0.5 s later, so
+        the caller (often the UI thread) never blocks.
         """
-        ok1 = self.set_parameter("MouthOpen", 0.8)
-        ok2 = self.set_parameter("EyeSmile", 0.6)
-        time.sleep(0.5)
-        self.set_parameter("MouthOpen", 0.0)
-        self.set_parameter("EyeSmile", 0.0)
-        return ok1 or ok2
+        ok = self.set_parameters([("MouthOpen", 0.8), ("EyeSmile", 0.6)])
+        if ok:
+            reset = threading.Timer(
+                0.5, self.set_parameters, args=([("MouthOpen", 0.0), ("EyeSmile", 0.0)],)
+            )
+            reset.daemon = True
+            reset.start()
+        return ok
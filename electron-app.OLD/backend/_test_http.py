@@ -0,0 +1,56 @@
+"""
+Shared HTTP clients for the backend test scripts
+One keep-alive pool per process instead of one per script or test function
+"""
+
+import atexit
+from typing import Dict, Optional
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import h2  # noqa: F401 - httpx needs it for HTTP/2 ('pip install httpx[http2]')
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_session: Optional[requests.Session] = None
+_async_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def get_session() -> requests.Session:
+    """Process-wide requests.Session (closed automatically at exit)"""
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        _session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=50))
+        atexit.register(_session.close)
+    return _session
+
+
+def get_async_client(base_url: str) -> httpx.AsyncClient:
+    """
+    Shared httpx.AsyncClient for base_url
+
+    Connections belong to the running event loop, so call
+    close_async_clients() before that loop ends (e.g. at the end of the
+    coroutine passed to asyncio.run).
+    """
+    client = _async_clients.get(base_url)
+    if client is None:
+        client = _async_clients[base_url] = httpx.AsyncClient(
+            base_url=base_url,
+            http2=HTTP2_AVAILABLE,
+            timeout=120.0,  # Chat replies wait on local generation
+            limits=httpx.Limits(max_keepalive_connections=20, keepalive_expiry=30)
+        )
+    return client
+
+
+async def close_async_clients():
+    """Close every shared async client"""
+    while _async_clients:
+        _, client = _async_clients.popitem()
+        await client.aclose()
@@ -3,12 +3,16 @@ Agent Manager - Spawns and manages agent threads
 Replaces Docker container orchestration with threading
 """
 
+import asyncio
+import concurrent.futures
 import threading
+import uuid
 from queue import Queue
 import time
 import logging
 from typing import Dict, Optional
-from datetime import datetime
+
+from agents.base_agent import Agent
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +24,11 @@ class AgentManager:
         self.message_queues: Dict[str, Queue] = {}
         self.response_queue = Queue()
         
+        # Replies are routed to their caller by request id, so concurrent
+        # requests never pick up each other's response
+        self._pending: Dict[str, concurrent.futures.Future] = {}
+        self._dispatcher: Optional[threading.Thread] = None
+        
         # Define storytelling agents (generic, user-customizable)
         self.agent_configs = {
             "character_1": {"role": "character", "name": "Character 1", "personality": "brave, action-oriented"},
@@ -30,6 +39,9 @@ class AgentManager:
     
     def start_all_agents(self):
         """Start all agent processes"""
+        if self._dispatcher is None or not self._dispatcher.is_alive():
+            self._dispatcher = threading.Thread(target=self._dispatch_responses, daemon=True)
+            self._dispatcher.start()
         for name, config in self.agent_configs.items():
             self.start_agent(name, config)
         time.sleep(1)
@@ -38,7 +50,6 @@ class AgentManager:
         """Start a single agent thread"""
         try:
             self.message_queues[name] = Queue()
-            from agents.base_agent import Agent
             thread = threading.Thread(
                 target=self._run_agent,
                 args=(name, config, self.message_queues[name], self.response_queue),
@@ -52,7 +63,6 @@ class AgentManager:
     
     def _run_agent(self, name: str, config: dict, msg_queue: Queue, resp_queue: Queue):
         """Agent thread main loop"""
-        from agents.base_agent import Agent
         agent = Agent(name, config, msg_queue, resp_queue)
         agent.run()
     
@@ -66,6 +76,24 @@ class AgentManager:
                 logger.info(f"Stopped agent: {name}")
             except Exception as e:
                 logger.error(f"Error stopping agent {name}: {e}")
+        self.response_queue.put(None)  # Stop the dispatcher
+    
+    def _dispatch_responses(self):
+        """Dispatcher thread: hand each reply to the caller waiting on its request id"""
+        while True:
+            response = self.response_queue.get()
+            if response is None:
+                break
+            fut = self._pending.pop(response.pop("request_id", None), None)
+            if fut is None:
+                logger.debug(f"Dropping unclaimed response from {response.get('agent')}")
+                continue
+            # The caller may time out and cancel fut at any moment, so set it
+            # and handle the error rather than checking done() first
+            try:
+                fut.set_result(response)
+            except concurrent.futures.InvalidStateError:
+                logger.debug(f"Dropping timed-out response from {response.get('agent')}")
     
     def restart_agent(self, name: str):
         """Restart a specific agent"""
@@ -88,30 +116,33 @@ class AgentManager:
             if target_agent not in self.message_queues:
                 raise ValueError(f"Unknown agent: {target_agent}")
             
+            request_id = uuid.uuid4().hex
+            reply = concurrent.futures.Future()
+            self._pending[request_id] = reply
             self.message_queues[target_agent].put({
                 "type": "chat",
                 "content": message,
-                "timestamp": datetime.now().isoformat()
+                "timestamp_ns": time.time_ns(),
+                "request_id": request_id
             })
             
-            import asyncio
-            start = time.time()
-            while time.time() - start < 10:
-                if not self.response_queue.empty():
-                    return self.response_queue.get()
-                await asyncio.sleep(0.1)
-            
-            return {
-                "agent": target_agent,
-                "response": "Agent is thinking... (timeout)",
-                "timestamp": datetime.now().isoformat()
-            }
+            # The dispatcher thread resolves the future when this request's reply arrives
+            try:
+                return await asyncio.wait_for(asyncio.wrap_future(reply), timeout=10)
+            except asyncio.TimeoutError:
+                return {
+                    "agent": target_agent,
+                    "response": "Agent is thinking... (timeout)",
+                    "timestamp_ns": time.time_ns()
+                }
+            finally:
+                self._pending.pop(request_id, None)
         except Exception as e:
             logger.error(f"Error processing message: {e}")
             return {
                 "agent": "system",
                 "response": f"Error: {str(e)}",
-                "timestamp": datetime.now().isoformat()
+                "timestamp_ns": time.time_ns()
             }
     
     def get_agent_status(self) -> dict:
@@ -5,21 +5,50 @@ Replaces multiprocessing with asyncio tasks for Windows compatibility
 
 import asyncio
 import logging
-from typing import Dict, Optional, List
+import time
+import uuid
+from typing import Callable, Dict, Optional, List
 from datetime import datetime
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+
+try:
+    from . import llm_manager
+    from .agents.async_agent import LLM_MODE, AsyncAgent
+except ImportError:  # Imported as a top-level module with backend/ on sys.path
+    import llm_manager
+    from agents.async_agent import LLM_MODE, AsyncAgent
 
 logger = logging.getLogger(__name__)
 
+# Chat messages waiting per agent; past this the agent is reported busy
+# instead of the backlog (and its memory) growing while the model catches up
+MAX_QUEUED_MESSAGES = 16
+
+# Seconds without agent traffic before the model's KV caches are released
+IDLE_RELEASE_SECONDS = 60
+
+
+def format_timestamp(timestamp_ns: int) -> str:
+    """ISO-8601 local time for a time.time_ns() timestamp (for API responses and display)"""
+    return datetime.fromtimestamp(timestamp_ns / 1e9).isoformat()
+
+
+def to_api_reply(reply: dict) -> dict:
+    """Copy of an agent reply with timestamp_ns replaced by an ISO "timestamp" string"""
+    reply = dict(reply)
+    reply["timestamp"] = format_timestamp(reply.pop("timestamp_ns"))
+    return reply
+
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AgentMessage:
-    """Message structure for agent communication"""
+    """Message structure for agent communication (immutable once queued)"""
     type: str
     content: str
-    timestamp: str
+    timestamp_ns: int = field(default_factory=time.time_ns)  # Format with format_timestamp()
     sender: Optional[str] = None
     metadata: Optional[dict] = None
+    request_id: Optional[str] = None  # Echoed back so the reply reaches its caller
 
 
 class AsyncAgentManager:
@@ -29,8 +58,20 @@ class AsyncAgentManager:
         self.agents: Dict[str, 'AsyncAgent'] = {}
         self.tasks: Dict[str, asyncio.Task] = {}
         self.message_queues: Dict[str, asyncio.Queue] = {}
+        self._status: Dict[str, str] = {}  # Kept current by task callbacks
         self.response_queue: asyncio.Queue = asyncio.Queue()
         
+        # Replies are routed to their caller by request id, so concurrent
+        # requests never pick up each other's response
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._dispatcher: Optional[asyncio.Task] = None
+        
+        # Idle tracking for releasing the in-process model's KV caches
+        self._last_activity = time.monotonic()
+        self._idle_released = True  # Nothing cached until a message arrives
+        self._idle_task: Optional[asyncio.Task] = None
+        self._warmup_task: Optional[asyncio.Task] = None
+        
         # Generic story agent configs (not DND-specific)
         # use_llm=True to use KoboldCPP, False for rule-based responses
         self.agent_configs = {
@@ -72,18 +113,41 @@ class AsyncAgentManager:
             return
         
         self.running = True
-        for name, config in self.agent_configs.items():
-            await self.start_agent(name, config)
+        await self._ensure_shared_model()
+        self._dispatcher = asyncio.create_task(self._dispatch_responses())
+        if LLM_MODE == 'inprocess':
+            self._idle_task = asyncio.create_task(self._idle_reaper())
+            # Warm the model in the background; a request arriving meanwhile
+            # just waits on the model lock for the single warmup token
+            self._warmup_task = asyncio.create_task(asyncio.to_thread(llm_manager.warmup))
+        await asyncio.gather(*(
+            self.start_agent(name, config)
+            for name, config in self.agent_configs.items()
+        ))
         
         logger.info(f"Started {len(self.agents)} agents")
     
+    async def _ensure_shared_model(self):
+        """
+        Load the in-process model once for the whole agent fleet
+        
+        Every agent generates through the llm_manager singleton, so the
+        GGUF weights are mapped a single time however many agents use them.
+        """
+        if LLM_MODE != 'inprocess' or llm_manager.is_model_loaded():
+            return
+        if not any(config.get("use_llm", True) for config in self.agent_configs.values()):
+            return
+        try:
+            if not await asyncio.to_thread(llm_manager.auto_load_model):
+                logger.warning("No model available - agents will use fallback responses")
+        except Exception as e:
+            logger.error(f"Shared model load failed: {e}")
+    
     async def start_agent(self, name: str, config: dict):
         """Start a single agent task"""
         try:
-            self.message_queues[name] = asyncio.Queue()
-            
-            # Import here to avoid circular imports
-            from .agents.async_agent import AsyncAgent
+            self.message_queues[name] = asyncio.Queue(maxsize=MAX_QUEUED_MESSAGES)
             
             agent = AsyncAgent(
                 name=name,
@@ -93,7 +157,9 @@ class AsyncAgentManager:
             )
             
             self.agents[name] = agent
-            self.tasks[name] = asyncio.create_task(agent.run())
+            task = self.tasks[name] = asyncio.create_task(agent.run())
+            self._status[name] = "running"
+            task.add_done_callback(lambda t, n=name: self._mark_stopped(n, t))
             
             logger.info(f"Started agent: {name}")
         except Exception as e:
@@ -106,17 +172,38 @@ class AsyncAgentManager:
         
         self.running = False
         
-        # Send stop messages
-        for name in list(self.agents.keys()):
-            await self.stop_agent(name)
+        # Send stop messages (each agent gets its own 5s grace period, in parallel)
+        await asyncio.gather(*(self.stop_agent(name) for name in list(self.agents.keys())))
+        
+        # stop_agent has already waited for (or cancelled) every task; report
+        # agents that died with an error instead of discarding it
+        for name, task in self.tasks.items():
+            if task.done() and not task.cancelled() and task.exception() is not None:
+                logger.error(f"Agent {name} exited with error: {task.exception()!r}")
         
-        # Wait for all tasks to complete
-        if self.tasks:
-            await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        if self._idle_task is not None:
+            self._idle_task.cancel()
+            self._idle_task = None
+        if self._warmup_task is not None:
+            # The warmup thread cannot be interrupted; give it the same 5s
+            # grace as an agent, then stop waiting on it
+            done, _ = await asyncio.wait({self._warmup_task}, timeout=5.0)
+            if not done:
+                self._warmup_task.cancel()
+            elif not self._warmup_task.cancelled() and self._warmup_task.exception() is not None:
+                logger.warning(f"Model warmup failed: {self._warmup_task.exception()!r}")
+            self._warmup_task = None
+        for fut in self._pending.values():
+            fut.cancel()
+        self._pending.clear()
         
         self.agents.clear()
         self.tasks.clear()
         self.message_queues.clear()
+        self._status.clear()
         
         logger.info("Stopped all agents")
     
@@ -126,22 +213,28 @@ class AsyncAgentManager:
             return
         
         try:
-            # Send stop signal
+            # Send stop signal (behind a full backlog it would not be seen
+            # for a long time, so cancel the task outright instead)
+            stop_sent = False
             if name in self.message_queues:
-                await self.message_queues[name].put(
-                    AgentMessage(
-                        type="stop",
-                        content="",
-                        timestamp=datetime.now().isoformat()
+                try:
+                    self.message_queues[name].put_nowait(
+                        AgentMessage(
+                            type="stop",
+                            content=""
+                        )
                     )
-                )
+                    stop_sent = True
+                except asyncio.QueueFull:
+                    logger.warning(f"Agent {name} backlog full - cancelling instead")
             
             # Wait for task to complete
             if name in self.tasks:
                 task = self.tasks[name]
-                try:
-                    await asyncio.wait_for(task, timeout=5.0)
-                except asyncio.TimeoutError:
+                done = set()
+                if stop_sent:
+                    done, _ = await asyncio.wait({task}, timeout=5.0)
+                if not done:
                     task.cancel()
                     try:
                         await task
@@ -152,85 +245,174 @@ class AsyncAgentManager:
         except Exception as e:
             logger.error(f"Error stopping agent {name}: {e}")
     
+    async def _dispatch_responses(self):
+        """Hand each agent reply to the caller waiting on its request id"""
+        while True:
+            response = await self.response_queue.get()
+            self._last_activity = time.monotonic()
+            fut = self._pending.pop(response.pop("request_id", None), None)
+            if fut is not None and not fut.done():
+                fut.set_result(response)
+            else:
+                logger.debug(f"Dropping unclaimed response from {response.get('agent')}")
+    
+    async def _idle_reaper(self):
+        """
+        Release the model's KV caches once agents have been idle for
+        IDLE_RELEASE_SECONDS, so memory returns to roughly the weights
+        between conversations instead of growing with every chat.
+        """
+        while True:
+            idle = time.monotonic() - self._last_activity
+            if idle < IDLE_RELEASE_SECONDS or self._pending:
+                await asyncio.sleep(max(IDLE_RELEASE_SECONDS - idle, 1.0))
+                continue
+            if not self._idle_released:
+                try:
+                    await asyncio.to_thread(llm_manager.release_idle_memory)
+                except Exception as e:
+                    logger.warning(f"Idle memory release failed: {e}")
+                self._idle_released = True
+            await asyncio.sleep(IDLE_RELEASE_SECONDS)
+    
     async def restart_agent(self, name: str):
         """Restart a specific agent"""
         if name not in self.agent_configs:
             raise ValueError(f"Unknown agent: {name}")
         
+        # stop_agent returns only once the old task has finished
         await self.stop_agent(name)
-        await asyncio.sleep(0.5)  # Brief pause
         await self.start_agent(name, self.agent_configs[name])
     
-    async def send_message(self, message: str, target_agent: Optional[str] = None, system_prompt: Optional[str] = None) -> dict:
-        """Send message to agent and wait for response"""
+    async def send_message(
+        self,
+        message: str,
+        target_agent: Optional[str] = None,
+        system_prompt: Optional[str] = None,
+        stream_callback: Optional[Callable[[str], None]] = None,
+        session_id: Optional[str] = None,
+        private: bool = False
+    ) -> dict:
+        """Send message to agent and wait for response
+        
+        stream_callback, if given, is called from a worker thread with each
+        text chunk as the in-process model decodes it. session_id scopes the
+        agent's semantic cache; private (encrypted sessions) bypasses it.
+        """
         if not self.running:
             return {
                 "agent": "system",
                 "response": "Agent system not running",
-                "timestamp": datetime.now().isoformat()
+                "timestamp_ns": time.time_ns()
             }
         
         try:
             if target_agent is None:
                 target_agent = "director"
             
-            if target_agent not in self.message_queues:
+            queue = self.message_queues.get(target_agent)
+            if queue is None:
                 raise ValueError(f"Unknown agent: {target_agent}")
             
             # Send message with system prompt
-            await self.message_queues[target_agent].put(
-                AgentMessage(
-                    type="chat",
-                    content=message,
-                    timestamp=datetime.now().isoformat(),
-                    metadata={"system_prompt": system_prompt} if system_prompt else {}
-                )
-            )
-            
-            # Wait for response (with timeout)
+            metadata = {"system_prompt": system_prompt} if system_prompt else {}
+            if stream_callback is not None:
+                metadata["stream_callback"] = stream_callback
+            if session_id is not None:
+                metadata["session_id"] = session_id
+                metadata["private"] = private
             try:
-                response = await asyncio.wait_for(
-                    self.response_queue.get(),
-                    timeout=30.0
-                )
-                return response
-            except asyncio.TimeoutError:
-                return {
-                    "agent": target_agent,
-                    "response": "Agent is processing... (timeout)",
-                    "timestamp": datetime.now().isoformat()
-                }
+                request_id, reply = self._enqueue(queue, message, metadata)
+            except asyncio.QueueFull:
+                return self._busy_reply(target_agent)
+            return await self._await_reply(target_agent, request_id, reply)
         
         except Exception as e:
             logger.error(f"Error processing message: {e}")
             return {
                 "agent": "system",
                 "response": f"Error: {str(e)}",
-                "timestamp": datetime.now().isoformat()
+                "timestamp_ns": time.time_ns()
             }
     
+    def _enqueue(self, queue: asyncio.Queue, message: str, metadata: dict):
+        """
+        Queue a chat message on an agent's queue; returns (request_id, reply future)
+        
+        Raises asyncio.QueueFull rather than waiting when the agent's backlog
+        is full, so callers can reject the request straight away.
+        """
+        request_id = uuid.uuid4().hex
+        reply = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = reply
+        try:
+            queue.put_nowait(
+                AgentMessage(
+                    type="chat",
+                    content=message,
+                    metadata=metadata,
+                    request_id=request_id
+                )
+            )
+        except BaseException:
+            self._pending.pop(request_id, None)
+            raise
+        self._last_activity = time.monotonic()
+        self._idle_released = False
+        return request_id, reply
+    
+    @staticmethod
+    def _busy_reply(target_agent: str) -> dict:
+        """Reply for a request rejected because the agent's backlog is full"""
+        return {
+            "agent": target_agent,
+            "response": "Agent is busy - please try again shortly",
+            "timestamp_ns": time.time_ns()
+        }
+    
+    async def _await_reply(self, target_agent: str, request_id: str, reply: asyncio.Future) -> dict:
+        """Wait for the reply to request_id (with timeout)"""
+        try:
+            return await asyncio.wait_for(reply, timeout=30.0)
+        except asyncio.TimeoutError:
+            return {
+                "agent": target_agent,
+                "response": "Agent is processing... (timeout)",
+                "timestamp_ns": time.time_ns()
+            }
+        finally:
+            self._pending.pop(request_id, None)
+    
     async def broadcast_message(self, message: str) -> List[dict]:
         """Send message to all agents and collect responses"""
         if not self.running:
             return []
         
-        # Send to all agents
-        tasks = []
-        for name in self.message_queues.keys():
-            tasks.append(self.send_message(message, target_agent=name))
-        
-        # Wait for all responses
-        responses = await asyncio.gather(*tasks, return_exceptions=True)
+        # Queue the message for every agent first, then wait on all replies
+        # together: total latency is the slowest agent, not the sum
+        busy = []
+        sent = {}
+        for name, queue in self.message_queues.items():
+            try:
+                sent[name] = self._enqueue(queue, message, {})
+            except asyncio.QueueFull:
+                busy.append(self._busy_reply(name))
+        responses = await asyncio.gather(*(
+            self._await_reply(name, *request)
+            for name, request in sent.items()
+        ), return_exceptions=True)
         
         # Filter out errors
-        return [r for r in responses if isinstance(r, dict)]
+        return [r for r in responses if isinstance(r, dict)] + busy
+    
+    def _mark_stopped(self, name: str, task: asyncio.Task):
+        """Task done-callback: record that an agent stopped (unless already restarted)"""
+        if self.tasks.get(name) is task:
+            self._status[name] = "stopped"
     
     def get_agent_status(self) -> dict:
         """Get status of all agents"""
-        return {
-            name: "running" if (name in self.tasks and not self.tasks[name].done()) else "stopped"
-            for name in self.agents.keys()
-        }
+        return dict(self._status)
     
     async def __aenter__(self):
         """Context manager entry"""
@@ -24,8 +24,8 @@ See SECURITY_CHECKLIST.md before modifying.
 import asyncio
 import logging
 import os
-from typing import Optional
-from datetime import datetime
+import time
+from typing import Callable, Optional
 import httpx
 
 logger = logging.getLogger(__name__)
@@ -66,6 +66,15 @@ class AsyncAgent:
                 logger.warning(f"Agent {name} memory disabled: {e}")
                 self.use_memory = False
         
+        # Semantic reply cache (opt-in via AURA_SEMANTIC_CACHE=1); reuses the
+        # memory system's embedding model rather than loading another
+        self.semantic_cache = None
+        try:
+            from ..semantic_cache import get_semantic_cache
+            self.semantic_cache = get_semantic_cache(getattr(self.memory_manager, "embedder", None))
+        except Exception as e:
+            logger.warning(f"Agent {name} semantic cache disabled: {e}")
+        
         # Legacy conversation history (fallback if memory disabled)
         self.conversation_history = []
         self.max_history = 20
@@ -93,18 +102,27 @@ class AsyncAgent:
                     break
                 
                 elif msg.type == "chat":
-                    # Extract system_prompt from metadata if provided
-                    system_prompt = msg.metadata.get("system_prompt") if hasattr(msg, 'metadata') and msg.metadata else None
+                    # Extract system_prompt / stream_callback from metadata if provided
+                    metadata = msg.metadata if hasattr(msg, 'metadata') and msg.metadata else {}
+                    system_prompt = metadata.get("system_prompt")
+                    stream_callback = metadata.get("stream_callback")
                     
                     # Generate response
-                    response = await self.generate_response(msg.content, system_prompt=system_prompt)
+                    response = await self.generate_response(
+                        msg.content,
+                        system_prompt=system_prompt,
+                        stream_callback=stream_callback,
+                        session_id=metadata.get("session_id"),
+                        private=metadata.get("private", False)
+                    )
                     
-                    # Send response
+                    # Send response (tagged so the manager can route it)
                     await self.resp_queue.put({
                         "agent": self.name,
                         "role": self.role,
                         "response": response,
-                        "timestamp": datetime.now().isoformat()
+                        "timestamp_ns": time.time_ns(),
+                        "request_id": getattr(msg, "request_id", None)
                     })
                 
                 elif msg.type == "update_context":
@@ -142,16 +160,27 @@ class AsyncAgent:
             # Fallback to legacy history
             self.conversation_history.append({
                 "content": message,
-                "timestamp": datetime.now().isoformat()
+                "timestamp_ns": time.time_ns()
             })
             
             if len(self.conversation_history) > self.max_history:
                 self.conversation_history = self.conversation_history[-self.max_history:]
     
-    async def generate_response(self, message: str, system_prompt: Optional[str] = None) -> str:
+    async def generate_response(
+        self,
+        message: str,
+        system_prompt: Optional[str] = None,
+        stream_callback: Optional[Callable[[str], None]] = None,
+        session_id: Optional[str] = None,
+        private: bool = False
+    ) -> str:
         """
         Generate response to user message
         Uses LLM if available, falls back to rule-based
+        (stream_callback only sees chunks from the in-process LLM)
+        
+        The semantic cache is scoped to session_id and skipped when there is
+        none or the session is private (encrypted medical conversations).
         """
         # Add to history
         self.add_to_history(f"User: {message}")
@@ -159,8 +188,26 @@ class AsyncAgent:
         # Try LLM first if enabled
         if self.use_llm:
             try:
-                response = await self.call_llm(message, system_prompt=system_prompt)
+                # Reuse the reply to a near-identical message, if one is cached
+                query_vec = None
+                use_cache = (
+                    self.semantic_cache is not None and self.semantic_cache.enabled
+                    and session_id is not None and not private
+                )
+                if use_cache:
+                    cached, query_vec = await asyncio.to_thread(
+                        self.semantic_cache.lookup, self.name, session_id, system_prompt, message
+                    )
+                    if cached is not None:
+                        if stream_callback is not None:
+                            stream_callback(cached)
+                        self.add_to_history(f"{self.name}: {cached}")
+                        return cached
+                
+                response = await self.call_llm(message, system_prompt=system_prompt, stream_callback=stream_callback)
                 if response and response != "[LLM response for: " + message + "]":
+                    if query_vec is not None:
+                        self.semantic_cache.store(self.name, session_id, system_prompt, query_vec, response)
                     self.add_to_history(f"{self.name}: {response}")
                     return response
             except Exception as e:
@@ -189,13 +236,25 @@ class AsyncAgent:
         # This is placeholder - integrate with KoboldCPP/LLM later
         return f"📖 As {message}, the story unfolds before you. The world feels alive with possibility."
     
-    async def call_llm(self, message: str, system_prompt: Optional[str] = None) -> str:
+    async def call_llm(
+        self,
+        message: str,
+        system_prompt: Optional[str] = None,
+        stream_callback: Optional[Callable[[str], None]] = None
+    ) -> str:
         """
         Call LLM with message (wrapper for generate_response_with_memory)
         """
-        return await self.generate_response_with_memory(message, system_prompt=system_prompt)
+        return await self.generate_response_with_memory(
+            message, system_prompt=system_prompt, stream_callback=stream_callback
+        )
     
-    async def generate_response_with_memory(self, prompt: str, system_prompt: Optional[str] = None) -> str:
+    async def generate_response_with_memory(
+        self,
+        prompt: str,
+        system_prompt: Optional[str] = None,
+        stream_callback: Optional[Callable[[str], None]] = None
+    ) -> str:
         """
         Generate response with memory-augmented context
         Supports both in-process (secure) and API modes
@@ -241,14 +300,20 @@ User: {prompt}
         
         # Choose LLM mode
         if LLM_MODE == 'inprocess':
-            return await self._call_inprocess_llm(full_prompt)
+            return await self._call_inprocess_llm(full_prompt, stream_callback=stream_callback)
         else:
             return await self._call_api_llm(full_prompt)
     
-    async def _call_inprocess_llm(self, prompt: str) -> str:
+    async def _call_inprocess_llm(
+        self,
+        prompt: str,
+        stream_callback: Optional[Callable[[str], None]] = None
+    ) -> str:
         """
         Call in-process LLM (secure, no external dependencies)
         Runs model directly in Python process with role-optimized sampling
+        Generation runs in a worker thread so the event loop is never blocked
+        while the model decodes.
         """
         try:
             # Import LLM manager
@@ -274,11 +339,14 @@ User: {prompt}
             else:
                 preset = llm_manager.get_sampling_preset("chat")
             
-            # Generate in-process with advanced sampling
-            generated = llm_manager.generate(
+            # Generate in-process with advanced sampling, in a worker thread
+            # so the event loop (other agents, streamed chunks) keeps running
+            generated = await asyncio.to_thread(
+                llm_manager.generate,
                 prompt=prompt,
                 max_tokens=self.max_tokens,
                 stop=["\nUser:", "\n\n\n"],
+                stream_callback=stream_callback,
                 **preset  # Unpack preset parameters
             )
             
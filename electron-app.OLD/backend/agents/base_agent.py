@@ -5,8 +5,7 @@ Runs in separate thread, communicates via queues
 
 import time
 import logging
-from queue import Queue
-from datetime import datetime
+from queue import Empty, Queue
 
 logger = logging.getLogger(__name__)
 
@@ -27,23 +26,25 @@ class Agent:
         
         while self.running:
             try:
-                # Check for messages (non-blocking)
-                if not self.msg_queue.empty():
+                # Wait briefly for a message; checking empty() first and then
+                # calling get() could block if the queue drained in between
+                try:
                     msg = self.msg_queue.get(timeout=0.1)
-                    
-                    if msg["type"] == "stop":
-                        self.running = False
-                        break
-                    
-                    elif msg["type"] == "chat":
-                        response = self.generate_response(msg["content"])
-                        self.resp_queue.put({
-                            "agent": self.name,
-                            "response": response,
-                            "timestamp": datetime.now().isoformat()
-                        })
+                except Empty:
+                    continue
                 
-                time.sleep(0.1)  # Prevent busy waiting
+                if msg["type"] == "stop":
+                    self.running = False
+                    break
+                
+                elif msg["type"] == "chat":
+                    response = self.generate_response(msg["content"])
+                    self.resp_queue.put({
+                        "agent": self.name,
+                        "response": response,
+                        "timestamp_ns": time.time_ns(),
+                        "request_id": msg.get("request_id")
+                    })
                 
             except Exception as e:
                 logger.error(f"Agent {self.name} error: {e}")
@@ -17,13 +17,16 @@ When adding features, check SECURITY_CHECKLIST.md FIRST.
 
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import uvicorn
+import asyncio
+import json
 import logging
 import os
-from typing import Optional, List
+from typing import Callable, Dict, Optional, List
 from datetime import datetime
-from .agent_manager_async import AsyncAgentManager
+from .agent_manager_async import AsyncAgentManager, format_timestamp, to_api_reply
 from . import llm_manager
 from .memory_manager import get_memory_manager
 from .hierarchical_memory import (
@@ -64,9 +67,93 @@ class ChatResponse(BaseModel):
     response: str
     timestamp: str
 
+class ChatBatchRequest(BaseModel):
+    messages: List[str]
+    target_agent: Optional[str] = None
+    session_id: Optional[str] = None
+    conversation_type: Optional[str] = None
+    encryption_key: Optional[str] = None
+    system_prompt: Optional[str] = None
+
+class ChatBatchResponse(BaseModel):
+    session_id: str
+    responses: List[ChatResponse]
+
 class BroadcastRequest(BaseModel):
     message: str
 
+# Map conversation type to ProjectType
+_CONVERSATION_TYPES = {
+    "peer_support": ProjectType.MEDICAL_PEER,
+    "medical_assistant": ProjectType.MEDICAL_ASSISTANT,
+    "story": ProjectType.STORYTELLING,
+    "general": ProjectType.GENERAL_CHAT
+}
+
+# One lock per session so concurrent requests cannot interleave its turns
+_session_locks: Dict[str, asyncio.Lock] = {}
+
+def _session_lock(session_id: str) -> asyncio.Lock:
+    lock = _session_locks.get(session_id)
+    if lock is None:
+        lock = _session_locks[session_id] = asyncio.Lock()
+    return lock
+
+def _get_or_create_session(session_id: str, conv_type: str, encryption_key: Optional[str]):
+    """Get a memory session, auto-creating it on first use"""
+    session_mgr = get_session_manager()
+    session = session_mgr.get_session(session_id)
+    if not session:
+        logger.info(f"Creating new session: {session_id} ({conv_type})")
+        session = session_mgr.create_session(
+            session_id=session_id,
+            project_type=_CONVERSATION_TYPES.get(conv_type, ProjectType.GENERAL_CHAT),
+            encryption_key=encryption_key
+        )
+    return session
+
+async def _chat_turn(
+    session,
+    message: str,
+    target_agent: Optional[str],
+    system_prompt: Optional[str],
+    stream_callback: Optional[Callable[[str], None]] = None
+) -> ChatResponse:
+    """Store the user message, get the agent's reply and store it too"""
+    # Add user message to memory
+    session.add_message(
+        content=message,
+        role="user",
+        metadata={"agent": target_agent or "user"}
+    )
+    
+    # Get agent response
+    response_data = await agent_manager.send_message(
+        message=message,
+        target_agent=target_agent,
+        system_prompt=system_prompt,
+        stream_callback=stream_callback,
+        session_id=session.project_id,
+        private=session.encrypted
+    )
+    
+    # Add agent response to memory
+    session.add_message(
+        content=response_data["response"],
+        role="assistant",
+        metadata={
+            "agent": response_data["agent"],
+            "role": response_data.get("role", "unknown")
+        }
+    )
+    
+    return ChatResponse(
+        agent=response_data["agent"],
+        role=response_data.get("role", "unknown"),
+        response=response_data["response"],
+        timestamp=format_timestamp(response_data["timestamp_ns"])
+    )
+
 @app.on_event("startup")
 async def startup():
     """Start all agents on server startup"""
@@ -123,69 +210,97 @@ async def chat(request: ChatRequest):
     Uses hierarchical memory with automatic session management
     """
     try:
-        # Get or create session
-        session_mgr = get_session_manager()
-        
         # Determine session ID and type
         session_id = request.session_id or "default_chat"
         conv_type = request.conversation_type or "general"
         
-        # Map conversation type to ProjectType
-        type_mapping = {
-            "peer_support": ProjectType.MEDICAL_PEER,
-            "medical_assistant": ProjectType.MEDICAL_ASSISTANT,
-            "story": ProjectType.STORYTELLING,
-            "general": ProjectType.GENERAL_CHAT
-        }
-        project_type = type_mapping.get(conv_type, ProjectType.GENERAL_CHAT)
-        
-        # Get or create session
-        session = session_mgr.get_session(session_id)
-        if not session:
-            # Auto-create session
-            logger.info(f"Creating new session: {session_id} ({conv_type})")
-            session = session_mgr.create_session(
-                session_id=session_id,
-                project_type=project_type,
-                encryption_key=request.encryption_key
-            )
-        
-        # Add user message to memory
-        session.add_message(
-            content=request.message,
-            role="user",
-            metadata={"agent": request.target_agent or "user"}
-        )
-        
-        # Get agent response
-        response_data = await agent_manager.send_message(
-            message=request.message,
-            target_agent=request.target_agent,
-            system_prompt=request.system_prompt
-        )
-        
-        # Add agent response to memory
-        session.add_message(
-            content=response_data["response"],
-            role="assistant",
-            metadata={
-                "agent": response_data["agent"],
-                "role": response_data.get("role", "unknown")
-            }
-        )
-        
-        return ChatResponse(
-            agent=response_data["agent"],
-            role=response_data.get("role", "unknown"),
-            response=response_data["response"],
-            timestamp=response_data["timestamp"]
-        )
+        async with _session_lock(session_id):
+            session = _get_or_create_session(session_id, conv_type, request.encryption_key)
+            return await _chat_turn(session, request.message, request.target_agent, request.system_prompt)
     except Exception as e:
         logger.error(f"Chat error: {e}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/chat/batch", response_model=ChatBatchResponse)
+async def chat_batch(request: ChatBatchRequest):
+    """
+    Send several messages to one session in a single request
+    Messages are handled in order under one session lock, as if posted to /chat
+    """
+    try:
+        session_id = request.session_id or "default_chat"
+        conv_type = request.conversation_type or "general"
+        
+        async with _session_lock(session_id):
+            session = _get_or_create_session(session_id, conv_type, request.encryption_key)
+            responses = [
+                await _chat_turn(session, message, request.target_agent, request.system_prompt)
+                for message in request.messages
+            ]
+        return ChatBatchResponse(session_id=session_id, responses=responses)
+    except Exception as e:
+        logger.error(f"Chat batch error: {e}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Same as /chat, but streams the reply as server-sent events
+    Emits {"token": ...} events while the model decodes, then one final
+    {"done": true, ...ChatResponse fields} event (or {"error": ...}).
+    The turn is stored in memory even if the client disconnects early.
+    """
+    session_id = request.session_id or "default_chat"
+    conv_type = request.conversation_type or "general"
+    
+    loop = asyncio.get_running_loop()
+    chunks: asyncio.Queue = asyncio.Queue()
+    
+    def on_chunk(text: str):
+        # Called from the generation thread
+        loop.call_soon_threadsafe(chunks.put_nowait, text)
+    
+    async def run_turn() -> ChatResponse:
+        async with _session_lock(session_id):
+            session = _get_or_create_session(session_id, conv_type, request.encryption_key)
+            return await _chat_turn(
+                session, request.message, request.target_agent, request.system_prompt,
+                stream_callback=on_chunk
+            )
+    
+    # Separate task, so a client disconnect does not cancel the turn
+    turn = asyncio.create_task(run_turn())
+    
+    def sse(payload: dict) -> str:
+        return f"data: {json.dumps(payload)}\n\n"
+    
+    async def events():
+        while True:
+            next_chunk = asyncio.ensure_future(chunks.get())
+            done, _ = await asyncio.wait({next_chunk, turn}, return_when=asyncio.FIRST_COMPLETED)
+            if next_chunk in done:
+                yield sse({"token": next_chunk.result()})
+                continue
+            next_chunk.cancel()
+            break
+        while True:
+            try:
+                token = chunks.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            yield sse({"token": token})
+        try:
+            yield sse({"done": True, **turn.result().model_dump()})
+        except Exception as e:
+            logger.error(f"Chat stream error: {e}")
+            yield sse({"error": str(e)})
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
 @app.post("/broadcast")
 async def broadcast(request: BroadcastRequest):
     """
@@ -195,7 +310,7 @@ async def broadcast(request: BroadcastRequest):
         responses = await agent_manager.broadcast_message(request.message)
         return {
             "message": request.message,
-            "responses": responses,
+            "responses": [to_api_reply(r) for r in responses],
             "count": len(responses)
         }
     except Exception as e:
@@ -240,14 +355,14 @@ async def start_agent(agent_name: str):
 @app.get("/model")
 async def get_model_status():
     """Get LLM model status"""
-    return llm_manager.get_model_info()
+    return dict(llm_manager.get_model_info())
 
 @app.post("/model/load")
 async def load_model_endpoint(model_path: str):
     """Load a specific model"""
     success = llm_manager.load_model(model_path)
     if success:
-        return {"status": "loaded", "info": llm_manager.get_model_info()}
+        return {"status": "loaded", "info": dict(llm_manager.get_model_info())}
     else:
         raise HTTPException(status_code=500, detail="Failed to load model")
 
@@ -259,19 +374,33 @@ async def unload_model_endpoint():
 
 # ===== Memory Management Endpoints =====
 
+async def _memory_stats(session_id: str) -> dict:
+    session_mgr = get_session_manager()
+    # Wait for an in-flight turn (e.g. a stream the client stopped reading).
+    # Only chats create locks: a session that never chatted has no turn to
+    # wait for, and creating locks here would let any id grow _session_locks
+    lock = _session_locks.get(session_id)
+    if lock is not None:
+        async with lock:
+            pass
+    session = session_mgr.get_session(session_id)
+    if not session:
+        return {
+            "error": "Session not found",
+            "session_id": session_id,
+            "available_sessions": [s["session_id"] for s in session_mgr.list_sessions()]
+        }
+    return session.get_stats()
+
 @app.get("/memory/stats")
-async def get_memory_stats(session_id: str = "default_chat"):
-    """Get memory system statistics for a session"""
+async def get_memory_stats(session_id: str = "default_chat", session_ids: Optional[str] = None):
+    """Get memory system statistics for a session
+    With session_ids=a,b,c, returns {session_id: stats} for all of them in one call
+    """
     try:
-        session_mgr = get_session_manager()
-        session = session_mgr.get_session(session_id)
-        if not session:
-            return {
-                "error": "Session not found",
-                "session_id": session_id,
-                "available_sessions": [s["session_id"] for s in session_mgr.list_sessions()]
-            }
-        return session.get_stats()
+        if session_ids:
+            return {sid: await _memory_stats(sid) for sid in session_ids.split(",") if sid}
+        return await _memory_stats(session_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -538,6 +667,13 @@ async def delete_all_medical_data(request: DeleteMedicalDataRequest):
         session_mgr = get_session_manager()
         result = session_mgr.delete_all_medical_data()
         
+        # Drop the deleted sessions' locks (a held one belongs to an
+        # in-flight turn and is left for it to release)
+        for session_id in result.get("deleted_sessions", []):
+            lock = _session_locks.get(session_id)
+            if lock is not None and not lock.locked():
+                del _session_locks[session_id]
+        
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
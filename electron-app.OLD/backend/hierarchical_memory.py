@@ -219,12 +219,11 @@ class HierarchicalMemory:
             logger.error(f"Failed to initialize ChromaDB: {e}")
             self.rag_enabled = False
     
-    def add_message(self, role: str, content: str, metadata: Optional[Dict] = None):
-        """Add message to active memory"""
+    def _build_message(self, role: str, content: str, metadata: Optional[Dict], timestamp: str) -> Dict:
         message = {
             "role": role,
             "content": content,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp,
             "metadata": metadata or {}
         }
         
@@ -233,6 +232,11 @@ class HierarchicalMemory:
             message["content_encrypted"] = True
             message["content"] = self.encryption_manager.encrypt(content).hex()
         
+        return message
+    
+    def add_message(self, role: str, content: str, metadata: Optional[Dict] = None):
+        """Add message to active memory"""
+        message = self._build_message(role, content, metadata, datetime.now().isoformat())
         self.active_memory.append(message)
         
         # Auto-promote to higher layers
@@ -242,6 +246,31 @@ class HierarchicalMemory:
         # Mark as active (not idle)
         self.idle_since = None
     
+    def add_messages(self, messages: List[Dict]):
+        """Add several {role, content, metadata} messages with one promotion pass
+        
+        Ends in the same layer state as calling add_message for each in order.
+        """
+        timestamp = datetime.now().isoformat()
+        self.active_memory.extend(
+            self._build_message(m.get("role", "user"), m["content"], m.get("metadata"), timestamp)
+            for m in messages
+        )
+        
+        # Promote the overflow in bulk: active -> short-term -> compression queue
+        overflow = len(self.active_memory) - self.ACTIVE_MAX
+        if overflow > 0:
+            self.short_term_memory.extend(self.active_memory[:overflow])
+            del self.active_memory[:overflow]
+            
+            spill = len(self.short_term_memory) - self.SHORT_TERM_MAX
+            if spill > 0:
+                self.compression_queue.extend(self.short_term_memory[:spill])
+                del self.short_term_memory[:spill]
+        
+        # Mark as active (not idle)
+        self.idle_since = None
+    
     def _promote_to_short_term(self):
         """Promote oldest active memory to short-term"""
         if not self.active_memory:
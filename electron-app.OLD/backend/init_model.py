@@ -1,6 +1,7 @@
 """
 Initialize AuraNexus with user's model
 """
+import os
 import sys
 sys.path.insert(0, r'C:\Users\hirog\All-In-One\AuraNexus\electron-app.OLD\backend')
 
@@ -15,7 +16,8 @@ print(f"📍 Path: {MODEL_PATH}")
 success = load_model(
     model_path=MODEL_PATH,
     n_ctx=4096,  # 4K context window
-    n_gpu_layers=33,  # Offload layers to GPU (auto-detect available)
+    n_gpu_layers=None,  # Auto-detect from available VRAM (a fixed 33 can OOM small GPUs)
+    n_threads=max(1, (os.cpu_count() or 2) // 2),  # Physical cores, not hyperthreads
     n_batch=512,
     verbose=False
 )
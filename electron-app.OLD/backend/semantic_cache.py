@@ -0,0 +1,171 @@
+"""
+Semantic response cache for agents
+Returns a stored reply when a new user message is close enough in meaning
+to one the same agent already answered in the same session, skipping LLM
+generation entirely
+
+⚠️ SECURITY: cached replies are conversation content (may contain PHI).
+They are kept in memory only, never persisted or logged, and never shared
+between sessions. Encrypted (medical) sessions bypass the cache entirely;
+see AsyncAgent.generate_response.
+
+Opt-in: set AURA_SEMANTIC_CACHE=1. Story replies depend on the running
+conversation, so a paraphrased question does not always deserve the same
+answer; enable it where repeated questions are expected (demos, FAQ-style
+assistants, tests).
+"""
+
+import logging
+import os
+import threading
+from hashlib import blake2b
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+SIMILARITY_THRESHOLD = 0.95  # Cosine similarity needed for a hit
+MAX_ENTRIES = 256            # Per agent / session / system prompt, LRU-evicted
+
+
+class _Bucket:
+    """Cached entries for one (agent, session, system prompt): embeddings as rows of one matrix"""
+    
+    __slots__ = ("embeddings", "responses", "last_used", "size")
+    
+    def __init__(self, dim: int, capacity: int):
+        self.embeddings = np.zeros((capacity, dim), dtype=np.float32)
+        self.responses: list = [None] * capacity
+        self.last_used = np.zeros(capacity, dtype=np.int64)
+        self.size = 0
+
+
+class SemanticCache:
+    """
+    Embedding-similarity cache of agent replies
+    
+    Embeddings are L2-normalised, so one matrix-vector product gives the
+    cosine similarity of a query against every cached message at once.
+    """
+    
+    def __init__(
+        self,
+        embed: Optional[Callable[[str], "np.ndarray"]],
+        threshold: float = SIMILARITY_THRESHOLD,
+        max_entries: int = MAX_ENTRIES
+    ):
+        self.embed = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.enabled = embed is not None and NUMPY_AVAILABLE
+        self._buckets: Dict[bytes, _Bucket] = {}
+        self._clock = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def _namespace(agent: str, session_id: str, system_prompt: Optional[str]) -> bytes:
+        """Cache namespace: replies are only reused by the same agent, session and system prompt"""
+        return blake2b(
+            f"{agent}\0{session_id}\0{system_prompt or ''}".encode("utf-8"), digest_size=16
+        ).digest()
+    
+    def _vector(self, message: str) -> "np.ndarray":
+        vec = np.asarray(self.embed(message), dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else vec
+    
+    def lookup(self, agent: str, session_id: str, system_prompt: Optional[str], message: str):
+        """
+        Find a cached reply for message
+        
+        Returns (reply or None, query embedding); pass the embedding back to
+        store() on a miss so the message is not embedded twice.
+        """
+        if not self.enabled:
+            return None, None
+        try:
+            vec = self._vector(message)
+        except Exception as e:
+            logger.warning(f"Semantic cache embedding failed: {e}")
+            return None, None
+        
+        with self._lock:
+            bucket = self._buckets.get(self._namespace(agent, session_id, system_prompt))
+            if bucket is not None and bucket.size:
+                sims = bucket.embeddings[:bucket.size] @ vec
+                best = int(np.argmax(sims))
+                if sims[best] >= self.threshold:
+                    self._clock += 1
+                    bucket.last_used[best] = self._clock
+                    self.hits += 1
+                    return bucket.responses[best], vec
+            self.misses += 1
+        return None, vec
+    
+    def store(self, agent: str, session_id: str, system_prompt: Optional[str], vec, response: str):
+        """Cache response for the message embedded as vec (from lookup)"""
+        if not self.enabled or vec is None:
+            return
+        namespace = self._namespace(agent, session_id, system_prompt)
+        with self._lock:
+            bucket = self._buckets.get(namespace)
+            if bucket is None:
+                bucket = self._buckets[namespace] = _Bucket(vec.shape[0], self.max_entries)
+            if bucket.size < self.max_entries:
+                row = bucket.size
+                bucket.size += 1
+            else:
+                row = int(np.argmin(bucket.last_used))  # Least recently used
+            self._clock += 1
+            bucket.embeddings[row] = vec
+            bucket.responses[row] = response
+            bucket.last_used[row] = self._clock
+    
+    def clear(self):
+        """Drop every cached reply"""
+        with self._lock:
+            self._buckets.clear()
+    
+    def get_stats(self) -> Dict:
+        """Hit/miss counters and entry count (no content)"""
+        with self._lock:
+            entries = sum(b.size for b in self._buckets.values())
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+# Global semantic cache instance (singleton)
+_semantic_cache: Optional[SemanticCache] = None
+
+
+def get_semantic_cache(embedder=None) -> SemanticCache:
+    """
+    Get or create the global semantic cache
+    
+    embedder is a SentenceTransformer (reuse MemoryManager.embedder so no
+    second model is loaded); without one, or unless AURA_SEMANTIC_CACHE=1,
+    the cache is disabled and every lookup misses.
+    """
+    global _semantic_cache
+    
+    if _semantic_cache is None:
+        embed = None
+        if embedder is not None and os.getenv("AURA_SEMANTIC_CACHE") == "1":
+            def embed(text: str):
+                return embedder.encode(text, normalize_embeddings=True)
+        _semantic_cache = SemanticCache(embed)
+        if _semantic_cache.enabled:
+            logger.info("Semantic response cache enabled")
+    
+    return _semantic_cache
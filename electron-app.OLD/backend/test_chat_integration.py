@@ -2,143 +2,212 @@
 Test updated chat endpoint with hierarchical memory
 """
 
+import asyncio
+import os
+import sys
 import requests
 import json
 import time
 
+try:
+    import orjson  # Optional: faster encode/decode of the JSON bodies
+except ImportError:
+    orjson = None
+
+# Add backend to path
+sys.path.insert(0, os.path.dirname(__file__))
+
+from _test_http import get_session, get_async_client, close_async_clients
+
 BASE_URL = "http://localhost:8000"
 
-def test_general_chat():
-    """Test general conversation (no encryption)"""
-    print("\n" + "="*60)
-    print("TEST 1: General Chat (No Encryption)")
-    print("="*60)
-    
-    # Send a few messages
-    messages = [
-        "Hello! How are you today?",
-        "Can you tell me about Python programming?",
-        "What's your favorite programming language?"
-    ]
-    
-    for msg in messages:
-        print(f"\n💬 User: {msg}")
-        response = requests.post(
-            f"{BASE_URL}/chat",
-            json={
-                "message": msg,
-                "session_id": "test_general_chat",
-                "conversation_type": "general"
-            }
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            print(f"🤖 {data['agent']}: {data['response'][:100]}...")
-        else:
-            print(f"❌ Error: {response.status_code}")
-            print(response.text)
-        
-        time.sleep(0.5)
-    
-    # Check memory stats
-    print("\n📊 Session Stats:")
-    stats = requests.get(
-        f"{BASE_URL}/memory/stats",
-        params={"session_id": "test_general_chat"}
-    ).json()
-    print(f"   Active messages: {stats.get('active_messages', 0)}")
-    print(f"   Encrypted: {stats.get('encrypted', False)}")
-    print(f"   Project type: {stats.get('project_type', 'unknown')}")
+# One keep-alive session for the whole run instead of a new connection per call
+SESSION = get_session()
 
-def test_medical_assistant():
-    """Test medical assistant (WITH encryption)"""
-    print("\n" + "="*60)
-    print("TEST 2: Medical Assistant (Encrypted)")
-    print("="*60)
-    
-    messages = [
-        "I've been feeling anxious lately",
-        "My insurance info is BlueCross policy #ABC123",
-        "Can you help me understand my symptoms?"
-    ]
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+def dumps(payload):
+    """Encode a request body (orjson when available)"""
+    return orjson.dumps(payload) if orjson else json.dumps(payload).encode()
+
+def loads(body):
+    """Decode a JSON body: bytes/str or a requests/httpx response (orjson when available)"""
+    body = getattr(body, "content", body)
+    return orjson.loads(body) if orjson else json.loads(body)
+
+async def stream_preview(client, payload, limit=100):
+    """POST to /chat/stream and return (agent, text) once limit chars arrive
     
-    encryption_key = "secure_medical_key_2026"
+    Stops reading there, so the client does not wait for the rest of the
+    reply (the server still finishes and stores the turn).
+    """
+    text = ""
+    async with client.stream("POST", "/chat/stream", content=dumps(payload), headers=JSON_HEADERS) as response:
+        if response.status_code != 200:
+            await response.aread()
+            return None, f"❌ Error: {response.status_code} {response.text}"
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            event = loads(line[len("data: "):])
+            if "token" in event:
+                text += event["token"]
+                if len(text) >= limit:
+                    return None, text
+            elif event.get("done"):
+                return event["agent"], event["response"]
+            elif "error" in event:
+                return None, f"❌ Error: {event['error']}"
+    return None, text
+
+# Short-lived cache for read-only state endpoints (/sessions/list,
+# /memory/stats): (path, params) -> (fetched_at, json)
+_CACHE = {}
+CACHE_TTL = 2.0
+
+def _cache_key(path, params):
+    return (path, tuple(sorted((params or {}).items())))
+
+def _cache_lookup(key, ttl):
+    hit = _CACHE.get(key)
+    if hit is not None and time.monotonic() - hit[0] < ttl:
+        return hit[1]
+    return None
+
+def cached_get(path, params=None, ttl=CACHE_TTL):
+    """GET path (relative to BASE_URL) through SESSION, reusing a recent result"""
+    key = _cache_key(path, params)
+    data = _cache_lookup(key, ttl)
+    if data is None:
+        data = loads(SESSION.get(f"{BASE_URL}{path}", params=params))
+        _CACHE[key] = (time.monotonic(), data)
+    return data
+
+async def cached_aget(client, path, params=None, ttl=CACHE_TTL):
+    """Async cached_get for the httpx client (shares the same cache)"""
+    key = _cache_key(path, params)
+    data = _cache_lookup(key, ttl)
+    if data is None:
+        data = loads(await client.get(path, params=params))
+        _CACHE[key] = (time.monotonic(), data)
+    return data
+
+def wait_until(predicate, timeout=5.0, interval=0.02):
+    """Poll predicate() until it returns True; False if timeout runs out"""
+    deadline = time.monotonic() + timeout
+    while True:
+        if predicate():
+            return True
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(interval)
+
+def _backend_ready():
+    try:
+        return SESSION.get(f"{BASE_URL}/", timeout=1.0).status_code == 200
+    except requests.exceptions.RequestException:
+        return False
+
+def invalidate_cache(*prefixes):
+    """Drop cached results for paths starting with any of the prefixes"""
+    for key in [k for k in _CACHE if k[0].startswith(prefixes)]:
+        del _CACHE[key]
+
+# (title, session_id, conversation_type, encryption_key, messages)
+SCENARIOS = [
+    (
+        "TEST 1: General Chat (No Encryption)",
+        "test_general_chat", "general", None,
+        [
+            "Hello! How are you today?",
+            "Can you tell me about Python programming?",
+            "What's your favorite programming language?"
+        ]
+    ),
+    (
+        "TEST 2: Medical Assistant (Encrypted)",
+        "test_medical_assistant", "medical_assistant", "secure_medical_key_2026",
+        [
+            "I've been feeling anxious lately",
+            "My insurance info is BlueCross policy #ABC123",
+            "Can you help me understand my symptoms?"
+        ]
+    ),
+    (
+        "TEST 3: Peer Support / Meta-Hiro (Encrypted)",
+        "test_peer_support", "peer_support", "metahiro_secure_2026",
+        [
+            "I'm struggling with depression today",
+            "My address is 123 Main Street, can we talk about home safety?"
+        ]
+    ),
+]
+
+async def run_scenario(client, title, session_id, conv_type, encryption_key, messages):
+    """Send one session's messages and return the lines to print for it"""
+    session = {"session_id": session_id, "conversation_type": conv_type}
+    if encryption_key:
+        session["encryption_key"] = encryption_key
     
-    for msg in messages:
-        print(f"\n💬 User: {msg}")
-        response = requests.post(
-            f"{BASE_URL}/chat",
-            json={
-                "message": msg,
-                "session_id": "test_medical_assistant",
-                "conversation_type": "medical_assistant",
-                "encryption_key": encryption_key
-            }
+    # One /chat/batch request for all but the last message; the server
+    # handles them in order, each turn building on the last
+    earlier, last = messages[:-1], messages[-1]
+    response = None
+    if earlier:
+        response = await client.post(
+            "/chat/batch",
+            content=dumps({"messages": earlier, **session}),
+            headers=JSON_HEADERS
         )
-        
-        if response.status_code == 200:
-            data = response.json()
-            print(f"🤖 {data['agent']}: {data['response'][:100]}...")
-        else:
-            print(f"❌ Error: {response.status_code}")
-            print(response.text)
-        
-        time.sleep(0.5)
+    # Only a preview of the last reply is printed: stream it and stop early
+    last_agent, last_text = await stream_preview(client, {"message": last, **session})
+    invalidate_cache("/sessions/list", "/memory/stats")
     
-    # Check memory stats
+    # Sessions run concurrently; collect the output and print it afterwards
+    lines = ["\n" + "="*60, title, "="*60]
+    if response is not None and response.status_code == 200:
+        for msg, data in zip(earlier, loads(response)["responses"]):
+            lines.append(f"\n💬 User: {msg}")
+            lines.append(f"🤖 {data['agent']}: {data['response'][:100]}...")
+    elif response is not None:
+        lines.append(f"\n❌ Error: {response.status_code}")
+        lines.append(response.text)
+    lines.append(f"\n💬 User: {last}")
+    lines.append(f"🤖 {last_agent or '(streamed)'}: {last_text[:100]}...")
+    return lines
+
+def print_session_stats(stats, encrypted):
+    lock = "🔒 " if encrypted else ""
     print("\n📊 Session Stats:")
-    stats = requests.get(
-        f"{BASE_URL}/memory/stats",
-        params={"session_id": "test_medical_assistant"}
-    ).json()
     print(f"   Active messages: {stats.get('active_messages', 0)}")
-    print(f"   🔒 Encrypted: {stats.get('encrypted', False)}")
+    print(f"   {lock}Encrypted: {stats.get('encrypted', False)}")
     print(f"   Project type: {stats.get('project_type', 'unknown')}")
 
-def test_peer_support():
-    """Test peer support (WITH encryption)"""
-    print("\n" + "="*60)
-    print("TEST 3: Peer Support / Meta-Hiro (Encrypted)")
-    print("="*60)
-    
-    messages = [
-        "I'm struggling with depression today",
-        "My address is 123 Main Street, can we talk about home safety?"
-    ]
-    
-    encryption_key = "metahiro_secure_2026"
-    
-    for msg in messages:
-        print(f"\n💬 User: {msg}")
-        response = requests.post(
-            f"{BASE_URL}/chat",
-            json={
-                "message": msg,
-                "session_id": "test_peer_support",
-                "conversation_type": "peer_support",
-                "encryption_key": encryption_key
-            }
-        )
-        
-        if response.status_code == 200:
-            data = response.json()
-            print(f"🤖 {data['agent']}: {data['response'][:100]}...")
-        else:
-            print(f"❌ Error: {response.status_code}")
-            print(response.text)
+async def run_chat_tests():
+    """Run the chat scenarios concurrently over one pooled client"""
+    client = get_async_client(BASE_URL)
+    try:
+        outputs = await asyncio.gather(*(run_scenario(client, *scenario) for scenario in SCENARIOS))
         
-        time.sleep(0.5)
+        # Stats for every session in one request (the endpoint waits for
+        # any streamed turn still being stored)
+        all_stats = await cached_aget(
+            client,
+            "/memory/stats",
+            params={"session_ids": ",".join(scenario[1] for scenario in SCENARIOS)}
+        )
+    finally:
+        await close_async_clients()
     
-    # Check memory stats
-    print("\n📊 Session Stats:")
-    stats = requests.get(
-        f"{BASE_URL}/memory/stats",
-        params={"session_id": "test_peer_support"}
-    ).json()
-    print(f"   Active messages: {stats.get('active_messages', 0)}")
-    print(f"   🔒 Encrypted: {stats.get('encrypted', False)}")
-    print(f"   Project type: {stats.get('project_type', 'unknown')}")
+    for (_, session_id, _, encryption_key, _), lines in zip(SCENARIOS, outputs):
+        print("\n".join(lines))
+        print_session_stats(all_stats.get(session_id, {}), encryption_key)
+
+def print_lines(lines):
+    """Write all lines with one stdout write instead of a print per item"""
+    text = "\n".join(lines)
+    if text:
+        sys.stdout.write(text + "\n")
 
 def test_session_list():
     """Test session listing"""
@@ -147,13 +216,15 @@ def test_session_list():
     print("="*60)
     
     print("\n📋 All Sessions:")
-    sessions = requests.get(f"{BASE_URL}/sessions/list").json()
+    sessions = cached_get("/sessions/list")
     
-    for session in sessions.get('sessions', []):
-        print(f"\n   • {session['session_id']}")
-        print(f"     Type: {session['project_type']}")
-        print(f"     Encrypted: {'🔒' if session['encrypted'] else '🔓'}")
-        print(f"     Messages: {session['stats']['active_messages']} active")
+    print_lines(
+        f"\n   • {session['session_id']}\n"
+        f"     Type: {session['project_type']}\n"
+        f"     Encrypted: {'🔒' if session['encrypted'] else '🔓'}\n"
+        f"     Messages: {session['stats']['active_messages']} active"
+        for session in sessions.get('sessions', [])
+    )
 
 def test_medical_deletion():
     """Test medical data deletion"""
@@ -163,29 +234,31 @@ def test_medical_deletion():
     
     # Get summary first
     print("\n📊 Medical Data Summary:")
-    summary = requests.get(f"{BASE_URL}/medical/summary").json()
+    summary = loads(SESSION.get(f"{BASE_URL}/medical/summary"))
     print(f"   Medical sessions: {summary['medical_sessions_count']}")
     
     if summary['medical_sessions_count'] > 0:
-        for session in summary['sessions']:
-            print(f"   • {session['session_id']} ({session['type']})")
+        print_lines(f"   • {session['session_id']} ({session['type']})" for session in summary['sessions'])
         
         # Delete all medical data
         print("\n🗑️  Deleting ALL medical data...")
-        result = requests.post(
+        result = loads(SESSION.post(
             f"{BASE_URL}/medical/delete-all",
-            json={"confirmation": "DELETE_ALL_MEDICAL_DATA"}
-        ).json()
+            data=dumps({"confirmation": "DELETE_ALL_MEDICAL_DATA"}),
+            headers=JSON_HEADERS
+        ))
+        invalidate_cache("/sessions/list", "/memory/stats")
         
         print(f"   ✅ Deleted {result['total_deleted']} sessions")
-        for sid in result['deleted_sessions']:
-            print(f"      • {sid}")
+        print_lines(f"      • {sid}" for sid in result['deleted_sessions'])
         
         # Verify general chat still exists
         print("\n📋 Remaining Sessions:")
-        sessions = requests.get(f"{BASE_URL}/sessions/list").json()
-        for session in sessions.get('sessions', []):
-            print(f"   • {session['session_id']} ({session['project_type']})")
+        sessions = cached_get("/sessions/list")
+        print_lines(
+            f"   • {session['session_id']} ({session['project_type']})"
+            for session in sessions.get('sessions', [])
+        )
     else:
         print("   No medical sessions to delete")
 
@@ -196,31 +269,19 @@ def main():
     print("\nMake sure the backend is running:")
     print("  cd electron-app/backend")
     print("  uvicorn core_app:app --reload")
-    print("\nPress Enter to start tests...")
-    input()
+    print("\nWaiting for backend...")
     
     try:
-        # Check if server is running
-        response = requests.get(f"{BASE_URL}/")
-        if response.status_code != 200:
+        # Poll until the server answers instead of waiting on a keypress
+        if not wait_until(_backend_ready, timeout=30.0, interval=0.05):
             print("❌ Backend not responding. Start it first!")
             return
         
         print("✅ Backend is running\n")
         
         # Run tests
-        test_general_chat()
-        time.sleep(1)
-        
-        test_medical_assistant()
-        time.sleep(1)
-        
-        test_peer_support()
-        time.sleep(1)
-        
+        asyncio.run(run_chat_tests())
         test_session_list()
-        time.sleep(1)
-        
         test_medical_deletion()
         
         print("\n" + "="*60)
@@ -2,13 +2,21 @@
 Test model generation
 """
 import sys
-sys.path.insert(0, r'C:\Users\hirog\All-In-One\AuraNexus\electron-app.OLD\backend')
+from pathlib import Path
 
-from llm_manager import generate, get_llm_instance
+# Add backend (this directory) to path, once
+if (backend_dir := str(Path(__file__).parent)) not in sys.path:
+    sys.path.insert(0, backend_dir)
 
-# Check if model is loaded
-if get_llm_instance() is None:
-    print("❌ No model loaded. Run init_model.py first!")
+from llm_manager import DEFAULT_MODEL_PATH, ensure_loaded, generate, tokenize_prompt
+
+# Shared by every assistant-style test prompt; tokenized once and matched
+# against the KV prefix cache on later generations
+SYSTEM_PREFIX = "You are a helpful AI assistant."
+
+# Load the model, or reuse it if this process already has it loaded
+if not ensure_loaded(DEFAULT_MODEL_PATH):
+    print("❌ Model failed to load. Check DEFAULT_MODEL_PATH in llm_manager.py")
     sys.exit(1)
 
 print("✅ Model is loaded")
@@ -17,7 +25,7 @@ print("-" * 50)
 
 # Test prompt
 response = generate(
-    prompt="You are a helpful AI assistant. User: Hello! How are you?\n\nAssistant:",
+    prompt=tokenize_prompt(SYSTEM_PREFIX, " User: Hello! How are you?\n\nAssistant:"),
     max_tokens=100,
     temperature=0.7,
     top_p=0.95
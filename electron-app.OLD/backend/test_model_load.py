@@ -1,6 +1,10 @@
 """Test model loading to see exact error"""
 import sys
-sys.path.insert(0, r"C:\Users\hirog\All-In-One\AuraNexus\electron-app.OLD\backend")
+from pathlib import Path
+
+# Add backend (this directory) to path, once
+if (backend_dir := str(Path(__file__).parent)) not in sys.path:
+    sys.path.insert(0, backend_dir)
 
 import llm_manager
 
@@ -9,7 +13,7 @@ print("[TEST] Attempting to load model...")
 print("=" * 60)
 
 model_path = r"C:\Users\hirog\OneDrive\Desktop\4. Models\Llama-3.1-8B-Lexi-Uncensored-V2-Q8_0.gguf"
-success = llm_manager.load_model(model_path, n_ctx=4096, n_gpu_layers=33)
+success = llm_manager.ensure_loaded(model_path, n_ctx=4096, n_gpu_layers=33)
 
 print("=" * 60)
 if success:
@@ -0,0 +1,110 @@
+"""
+Test prompt token assembly in llm_manager
+Segment-cached token ids must equal a one-pass tokenize of the joined prompt,
+and BOS is only added when the model's vocab asks for it.
+Uses a stand-in tokenizer, so no model file or llama-cpp-python is needed.
+"""
+import sys
+from pathlib import Path
+
+# Add backend (this directory) to path, once
+if (backend_dir := str(Path(__file__).parent)) not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+import llm_manager
+
+BOS = 1
+
+
+class FakeLlama:
+    """
+    Character-level tokenizer with llama.cpp's tokenize() semantics:
+    add_bos=True prepends BOS only if the vocab wants it, and a
+    SentencePiece-style vocab adds a leading space to every call.
+    """
+
+    def __init__(self, add_bos: bool, space_prefix: bool):
+        self.add_bos = add_bos
+        self.space_prefix = space_prefix
+
+    def token_bos(self) -> int:
+        return BOS
+
+    def tokenize(self, data: bytes, add_bos: bool = True):
+        text = data.decode("utf-8")
+        if self.space_prefix:
+            text = " " + text
+        return ([BOS] if add_bos and self.add_bos else []) + [ord(c) + 10 for c in text]
+
+
+def _prompt_ids(llm: FakeLlama, **kwargs):
+    """Token ids generate_with_context sends to generate() for llm"""
+    captured = {}
+
+    def fake_generate(prompt, **_):
+        captured["prompt"] = prompt
+        return "ok"
+
+    saved = (llm_manager._llm_instance, llm_manager._cached_n_ctx, llm_manager.generate)
+    try:
+        llm_manager._llm_instance = llm
+        llm_manager._cached_n_ctx = 4096
+        llm_manager._vocab_generation += 1  # Drop ids cached for another tokenizer
+        llm_manager._token_cache.clear()
+        llm_manager._probe_tokenizer()
+        llm_manager.generate = fake_generate
+        llm_manager.generate_with_context(**kwargs)
+        return captured["prompt"]
+    finally:
+        llm_manager._llm_instance, llm_manager._cached_n_ctx, llm_manager.generate = saved
+
+
+HISTORY = [
+    {"role": "user", "content": "Hello there"},
+    {"role": "assistant", "content": "Hi! How can I help?"},
+]
+JOINED = (
+    "System: Be brief.\n\n"
+    "User: Hello there\n\n"
+    "Assistant: Hi! How can I help?\n\n"
+    "User: What now?\n\nAssistant:"
+)
+
+
+def test_segments_match_one_pass():
+    """Cached per-segment ids equal tokenizing the whole prompt at once"""
+    for add_bos in (True, False):
+        for space_prefix in (False, True):
+            llm = FakeLlama(add_bos, space_prefix)
+            ids = _prompt_ids(llm, prompt="What now?", system_prompt="Be brief.", conversation_history=HISTORY)
+            assert ids == llm.tokenize(JOINED.encode("utf-8"), add_bos=True), (add_bos, space_prefix)
+
+
+def test_no_bos_when_vocab_has_none():
+    """A vocab without add_bos_token (e.g. Qwen2.5) gets no BOS prepended"""
+    llm = FakeLlama(add_bos=False, space_prefix=False)
+    ids = _prompt_ids(llm, prompt="What now?")
+    assert ids[0] != BOS
+
+
+def test_tokenize_prompt_matches_one_pass():
+    """tokenize_prompt shares the BOS and segment handling"""
+    for add_bos in (True, False):
+        for space_prefix in (False, True):
+            llm = FakeLlama(add_bos, space_prefix)
+            _prompt_ids(llm, prompt="probe")  # Leaves the probed traits in place
+            saved = llm_manager._llm_instance
+            try:
+                llm_manager._llm_instance = llm
+                ids = llm_manager.tokenize_prompt("You are helpful.", " User: Hi\n\nAssistant:")
+            finally:
+                llm_manager._llm_instance = saved
+            expected = llm.tokenize(b"You are helpful. User: Hi\n\nAssistant:", add_bos=True)
+            assert ids == expected, (add_bos, space_prefix)
+
+
+if __name__ == "__main__":
+    test_segments_match_one_pass()
+    test_no_bos_when_vocab_has_none()
+    test_tokenize_prompt_matches_one_pass()
+    print("✅ Prompt token assembly tests passed")
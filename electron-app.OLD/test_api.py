@@ -2,58 +2,70 @@
 Test the FastAPI backend with async agents
 """
 
-import httpx
 import asyncio
+import os
+import sys
+
+# Add backend directory to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'backend'))
+
+from _test_http import get_async_client, close_async_clients
 
 
 async def test_api():
     """Test all API endpoints"""
     base_url = "http://localhost:8001"
     
-    async with httpx.AsyncClient() as client:
+    client = get_async_client(base_url)
+    try:
         print("=== Testing AuraNexus FastAPI Backend ===\n")
         
+        # Tests 1 and 2 are independent reads: fetch both at once
+        health, agents = await asyncio.gather(client.get("/"), client.get("/agents"))
+        
         # Test 1: Health check
         print("1. Testing health check...")
-        resp = await client.get(f"{base_url}/")
-        print(f"   Status: {resp.json()}\n")
+        print(f"   Status: {health.json()}\n")
         
         # Test 2: List agents
         print("2. Listing agent status...")
-        resp = await client.get(f"{base_url}/agents")
-        print(f"   Agents: {resp.json()}\n")
+        print(f"   Agents: {agents.json()}\n")
+        
+        # Tests 3 and 4 are independent agents: send both at once
+        narrator_resp, director_resp = await asyncio.gather(
+            client.post(
+                "/chat",
+                json={
+                    "message": "A mysterious traveler arrives at the crossroads",
+                    "target_agent": "narrator"
+                }
+            ),
+            client.post(
+                "/chat",
+                json={
+                    "message": "What should happen next in the story?",
+                    "target_agent": "director"
+                }
+            )
+        )
         
         # Test 3: Send chat message to narrator
         print("3. Sending message to narrator...")
-        resp = await client.post(
-            f"{base_url}/chat",
-            json={
-                "message": "A mysterious traveler arrives at the crossroads",
-                "target_agent": "narrator"
-            }
-        )
-        result = resp.json()
+        result = narrator_resp.json()
         print(f"   Agent: {result['agent']}")
         print(f"   Role: {result['role']}")
         print(f"   Response: {result['response']}\n")
         
         # Test 4: Send to director
         print("4. Sending message to director...")
-        resp = await client.post(
-            f"{base_url}/chat",
-            json={
-                "message": "What should happen next in the story?",
-                "target_agent": "director"
-            }
-        )
-        result = resp.json()
+        result = director_resp.json()
         print(f"   Agent: {result['agent']}")
         print(f"   Response: {result['response']}\n")
         
         # Test 5: Broadcast to all agents
         print("5. Broadcasting to all agents...")
         resp = await client.post(
-            f"{base_url}/broadcast",
+            "/broadcast",
             json={"message": "The adventure begins now!"}
         )
         result = resp.json()
@@ -62,6 +74,8 @@ async def test_api():
             print(f"     - {r['agent']}: {r['response'][:60]}...")
         
         print("\n✅ All API tests passed!")
+    finally:
+        await close_async_clients()
 
 
 if __name__ == "__main__":
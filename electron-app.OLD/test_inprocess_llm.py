@@ -46,6 +46,9 @@ async def test_inprocess_llm():
     else:
         print(f"   ✅ Model already loaded: {model_info['model_path']}")
     
+    # One-token warmup so the timed/visible generation below runs at steady state
+    await asyncio.to_thread(llm_manager.warmup)
+    
     print(f"\n2. Testing direct generation...")
     test_prompt = "You are a storyteller. Describe a mysterious forest: "
     
@@ -107,6 +110,14 @@ async def test_fallback_only():
         print("✅ Fallback mode works without model")
 
 
+# CPU build flag for llama.cpp: NATIVE enables exactly the SIMD extensions the
+# build machine has. Forcing AVX-512 on would crash (SIGILL) on CPUs without it
+CPU_CMAKE_ARGS = "-DLLAMA_NATIVE=on"
+
+# Quantizations in the order llm_manager.auto_load_model() prefers them
+QUANT_PREFERENCE = sorted(llm_manager._QUANT_PREFERENCE, key=llm_manager._QUANT_PREFERENCE.get)
+
+
 async def show_model_requirements():
     """Show what's needed to run with a model"""
     print("\n" + "="*70)
@@ -116,6 +127,14 @@ async def show_model_requirements():
     print("1. llama-cpp-python installed")
     print("   - Already in requirements.txt")
     print("   - For GPU: CMAKE_ARGS=\"-DLLAMA_CUBLAS=on\" pip install llama-cpp-python")
+    print("     (all layers are then offloaded automatically - no extra settings needed)")
+    print("   - For CPU: build for this machine's SIMD (AVX2, AVX-512/VNNI where present);")
+    print("     prebuilt wheels target a generic CPU and run K-quants much slower")
+    print(f"     CMAKE_ARGS=\"{CPU_CMAKE_ARGS}\" \\")
+    print("       pip install --force-reinstall --no-cache-dir --no-binary llama-cpp-python llama-cpp-python")
+    print("     (llama-cpp-python >= 0.2.80 renamed the flags: use -DGGML_NATIVE=on)")
+    print("     Cross-compiling for another CPU: turn NATIVE off and list its features,")
+    print("     e.g. -DLLAMA_AVX2=on -DLLAMA_FMA=on -DLLAMA_F16C=on (AVX-512 only if it has it)")
     print()
     print("2. A GGUF model file")
     print("   Recommended models (4-8GB):")
@@ -123,6 +142,10 @@ async def show_model_requirements():
     print("   - Phi-2 (Q5_K_M) - Fast, compact")
     print("   - TinyLlama-1.1B (Q5_K_M) - Very fast, minimal memory")
     print()
+    print("   Quantization (auto-load picks the first one it finds, in this order):")
+    print(f"   - {' > '.join(QUANT_PREFERENCE)}")
+    print("   - Q4_K_M runs 10-20x faster than F16 on CPU with ~1/4 the RAM")
+    print()
     print("   Download from:")
     print("   - https://huggingface.co/TheBloke")
     print("   - https://huggingface.co/bartowski")
@@ -22,12 +22,21 @@ if getattr(sys, 'frozen', False):
     from launcher.docker_manager import DockerManager
     from launcher.config import LauncherConfig
 else:
-    # Running as script
-    launcher_dir = Path(__file__).parent
-    sys.path.insert(0, str(launcher_dir))
-    from updater import UpdateChecker
-    from docker_manager import DockerManager
-    from config import LauncherConfig
+    # Running as script: load sibling modules straight from their files instead
+    # of prepending this directory to sys.path (which every later import would
+    # then search first)
+    import importlib.util
+
+    def _load_sibling(name: str):
+        spec = importlib.util.spec_from_file_location(name, Path(__file__).parent / f"{name}.py")
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+        return module
+
+    UpdateChecker = _load_sibling("updater").UpdateChecker
+    DockerManager = _load_sibling("docker_manager").DockerManager
+    LauncherConfig = _load_sibling("config").LauncherConfig
 
 
 class LauncherWindow(QMainWindow):